@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import random
+import sys
+from multiprocessing import Pool
+from time import perf_counter
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')    # keep stdout for the JSON report
+import pygame   # noqa: E402
+from benchmarks.runner import summarize     # noqa: E402
+from ghost_engine import GhostEngine    # noqa: E402
+
+
+class RandomBot:
+    """Scripted input which presses a random movement or portal key every few steps"""
+    KEYS = [pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_q, pygame.K_w]
+
+    def __init__(self, seed, interval=20):
+        self.rng = random.Random(seed)
+        self.interval = interval
+
+    def __call__(self, step):
+        """Post this step's key press, if any"""
+        if step % self.interval == 0:
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=self.rng.choice(RandomBot.KEYS)))
+
+
+def init_worker():
+    """Send a worker's printed messages (e.g. no high scores while loading) to stderr, keeping stdout for the report"""
+    sys.stdout = sys.stderr
+
+
+def run_game(job):
+    """Play one headless game as described by a job dict, returning its statistics and step times"""
+    from pacman_game import PacManPortalGame    # imported per worker, after the pool has started
+    from input_log import InputLog
+    replay_log = InputLog.load(job['replay']) if job['replay'] else None
+    game = PacManPortalGame(headless=True, seed=job['seed'], replay_log=replay_log,
+                            ghost_engine=job['ghost_engine'], maze_file=job['maze'])
+    bot = None if replay_log else RandomBot(job['seed'], job['bot_interval'])
+    step_times = []
+    result = game.simulate_game(max_steps=job['max_steps'], controller=bot, step_times=step_times)
+    result.update(job)
+    if replay_log:
+        result['seed'] = replay_log.seed    # replays always use their recorded seed
+    return result, step_times
+
+
+def make_jobs(games, seed, mazes, replays, max_steps, bot_interval, ghost_engine):
+    """Describe each game to run, giving game i the seed seed + i and cycling through mazes and replays"""
+    jobs = []
+    for i in range(games):
+        replay = replays[i % len(replays)] if replays else None
+        jobs.append({'game': i, 'seed': seed + i, 'maze': mazes[i % len(mazes)], 'replay': replay,
+                     'max_steps': max_steps, 'bot_interval': bot_interval, 'ghost_engine': ghost_engine})
+    return jobs
+
+
+def run_batch(jobs, processes=None):
+    """Run the jobs across a process pool and aggregate their results into a report"""
+    start = perf_counter()
+    pool = Pool(processes, initializer=init_worker)
+    try:
+        outcomes = pool.map(run_game, jobs, chunksize=1)
+    finally:    # let workers exit on their own, pygame turns the SIGTERM sent by Pool.terminate into a QUIT event
+        pool.close()
+        pool.join()
+    elapsed = perf_counter() - start
+    games = [result for result, _ in outcomes]
+    all_steps = [t for _, step_times in outcomes for t in step_times]
+    scores = [g['score'] for g in games]
+    levels = [g['level'] for g in games]
+    total_steps = sum(g['steps'] for g in games)
+    return {
+        'games': len(games),
+        'processes': processes or os.cpu_count(),
+        'seconds': elapsed,
+        'total_steps': total_steps,
+        'steps_per_second': total_steps / elapsed if elapsed else 0.0,
+        'score': {'mean': sum(scores) / len(scores) if scores else 0.0,
+                  'min': min(scores, default=0), 'max': max(scores, default=0)},
+        'levels': {str(level): levels.count(level) for level in sorted(set(levels))},
+        'game_overs': sum(1 for g in games if g['game_over']),
+        'step_time': summarize(all_steps),
+        'results': sorted(games, key=lambda g: g['game']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run many headless PacMan Portal games in parallel')
+    parser.add_argument('--games', type=int, default=8, help='number of games to run')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game, each later game adds one')
+    parser.add_argument('--maze', action='append', dest='mazes',
+                        help='maze map file (may be repeated, games cycle through them)')
+    parser.add_argument('--replay', action='append', dest='replays',
+                        help='recorded input log to replay instead of the bot (may be repeated)')
+    parser.add_argument('--steps', type=int, default=36000, help='maximum steps per game (default: 10 game minutes)')
+    parser.add_argument('--bot-interval', type=int, default=20, help='steps between the bot\'s random key presses')
+    parser.add_argument('--ghost-engine', action='store_true', help='move ghosts with the NumPy ghost engine')
+    parser.add_argument('--output', default=None, help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+    if args.ghost_engine and not GhostEngine.available():
+        parser.error('--ghost-engine requires numpy')
+    jobs = make_jobs(args.games, args.seed, args.mazes or ['maze_map.txt'], args.replays, args.steps,
+                     args.bot_interval, args.ghost_engine)
+    report = run_batch(jobs, args.processes)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
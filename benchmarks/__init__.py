@@ -0,0 +1 @@
+"""Benchmarks for the game's hot paths, run from the repository root with 'python -m benchmarks'"""
@@ -0,0 +1,51 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+from contextlib import redirect_stdout
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')    # keep stdout for the JSON report
+import pygame   # noqa: E402
+from pacman_game import PacManPortalGame   # noqa: E402
+from benchmarks.cases import CASES  # noqa: E402
+from benchmarks.runner import summarize     # noqa: E402
+
+
+def run_benchmarks(iterations=1000, seed=0, names=None):
+    """Run the selected benchmark cases, each on a fresh headless game with a fixed seed"""
+    results = {}
+    for name, case in CASES:
+        if names and name not in names:
+            continue
+        random.seed(seed)   # fruit placement in the maze
+        with redirect_stdout(sys.stderr):   # keep messages printed while loading (e.g. no high scores) off stdout
+            game = PacManPortalGame(headless=True)
+        results[name] = summarize(case(game, random.Random(seed), iterations))
+    return {
+        'seed': seed,
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the PacMan Portal hot paths')
+    parser.add_argument('--iterations', type=int, default=1000, help='timed calls per benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='seed for scripted inputs and maze generation')
+    parser.add_argument('--case', action='append', dest='names', choices=[name for name, _ in CASES],
+                        help='run only the named benchmark (may be repeated)')
+    parser.add_argument('--output', default=None, help='write JSON results to this file instead of stdout')
+    args = parser.parse_args()
+    report = run_benchmarks(args.iterations, args.seed, args.names)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
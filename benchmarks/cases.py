@@ -0,0 +1,125 @@
+import pygame
+from ghost import Ghost
+from game_clock import GameClock
+from pacman_game import PacManPortalGame
+from path_finder import PathFinder
+from benchmarks.runner import measure
+
+MOVE_KEYS = [pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT]
+ACTION_KEYS = MOVE_KEYS + [pygame.K_q, pygame.K_w]
+DIRECTIONS = ['u', 'l', 'd', 'r']
+
+
+def open_tiles(maze):
+    """Return every tile of the maze map which is not a wall"""
+    finder = PathFinder.for_map(maze.map_lines)
+    return [(i, j) for i in range(len(finder.maze_map)) for j in range(len(finder.maze_map[i]))
+            if finder.is_open((i, j))]
+
+
+def place(sprite, maze, tile):
+    """Move a sprite's rect to the top left corner of a maze tile"""
+    sprite.rect.left = maze.grid.x_start + (tile[1] * maze.block_size)
+    sprite.rect.top = maze.grid.y_start + (tile[0] * maze.block_size)
+
+
+def bench_build_maze(game, rng, iterations):
+    """Rebuild the maze from its map"""
+    return measure(game.maze.build_maze, iterations)
+
+
+def bench_find_path(game, rng, iterations):
+    """Find paths between random open tiles, starting from an empty path cache"""
+    PathFinder.loaded.clear()
+    tiles = open_tiles(game.maze)
+    pairs = [(rng.choice(tiles), rng.choice(tiles)) for _ in range(iterations)]
+    call = {}
+
+    def setup(i):
+        call['pair'] = pairs[i]
+    return measure(lambda: Ghost.find_path(game.maze.map_lines, *call['pair']), iterations, setup)
+
+
+def bench_get_direction_options(game, rng, iterations):
+    """Check a ghost's open directions from random open tiles"""
+    tiles = open_tiles(game.maze)
+    ghost = game.first_ghost
+    return measure(ghost.get_direction_options, iterations, lambda i: place(ghost, game.maze, rng.choice(tiles)))
+
+
+def bench_is_blocked(game, rng, iterations):
+    """Check whether PacMan is blocked, from random open tiles in random directions"""
+    tiles = open_tiles(game.maze)
+    player = game.player
+    player.moving = True
+
+    def setup(i):
+        place(player, game.maze, rng.choice(tiles))
+        player.direction = rng.choice(DIRECTIONS)
+    return measure(player.is_blocked, iterations, setup)
+
+
+def bench_eat(game, rng, iterations):
+    """Eat from random open tiles, rebuilding the maze whenever it runs out of pellets"""
+    tiles = open_tiles(game.maze)
+
+    def setup(i):
+        if not game.maze.pellets_left():
+            game.maze.build_maze()
+        place(game.player, game.maze, rng.choice(tiles))
+    return measure(game.player.eat, iterations, setup)
+
+
+def bench_portal_update(game, rng, iterations):
+    """Update portals while firing projectiles from random open tiles in random directions"""
+    tiles = open_tiles(game.maze)
+    player = game.player
+    controller = player.portal_controller
+
+    def setup(i):
+        if not controller.blue_projectile and not controller.orange_projectile:
+            place(player, game.maze, rng.choice(tiles))
+            player.direction = rng.choice(DIRECTIONS)
+            if i % 2:
+                controller.fire_b_portal_projectile()
+            else:
+                controller.fire_o_portal_projectile()
+    times = measure(controller.update, iterations, setup)
+    game.maze.build_maze()  # repair walls and holes left by the portals
+    player.clear_portals()
+    return times
+
+
+def bench_maze_blit(game, rng, iterations):
+    """Blit the maze to the screen"""
+    return measure(game.maze.blit, iterations)
+
+
+def bench_update_screen(game, rng, iterations):
+    """Run full game steps with scripted key presses, starting a new game on game over"""
+    state = {'loop': game.start_game()}
+
+    def setup(i):
+        if not state['loop'].loop_running:
+            state['loop'] = game.start_game()
+        GameClock.advance(PacManPortalGame.STEP_TIME)
+        if i % 20 == 0:
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=rng.choice(ACTION_KEYS)))
+        state['loop'].check_events()
+    times = []
+    for i in range(iterations):     # game over checks happen between timed steps
+        times += measure(game.update_screen, 1, lambda _: setup(i))
+        game.check_game_over(state['loop'])
+    return times
+
+
+CASES = [
+    ('maze.build_maze', bench_build_maze),
+    ('ghost.find_path', bench_find_path),
+    ('ghost.get_direction_options', bench_get_direction_options),
+    ('pacman.is_blocked', bench_is_blocked),
+    ('pacman.eat', bench_eat),
+    ('portal_controller.update', bench_portal_update),
+    ('maze.blit', bench_maze_blit),
+    ('game.update_screen', bench_update_screen),
+]
@@ -0,0 +1,37 @@
+from time import perf_counter
+
+
+def measure(func, iterations, setup=None):
+    """Call func the given number of times, returning each call's duration in seconds.
+    If provided, setup is called before each call and is not timed."""
+    times = []
+    for i in range(iterations):
+        if setup:
+            setup(i)
+        start = perf_counter()
+        func()
+        times.append(perf_counter() - start)
+    return times
+
+
+def percentile(sorted_times, pct):
+    """Return the nearest-rank percentile of an already sorted list"""
+    if not sorted_times:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_times))) - 1, 0)
+    return sorted_times[min(rank, len(sorted_times) - 1)]
+
+
+def summarize(times):
+    """Summarize call durations as microsecond statistics"""
+    ordered = sorted(times)
+    to_us = 1000000
+    return {
+        'iterations': len(ordered),
+        'mean_us': (sum(ordered) / len(ordered)) * to_us if ordered else 0.0,
+        'min_us': ordered[0] * to_us if ordered else 0.0,
+        'p50_us': percentile(ordered, 50) * to_us,
+        'p90_us': percentile(ordered, 90) * to_us,
+        'p99_us': percentile(ordered, 99) * to_us,
+        'max_us': ordered[-1] * to_us if ordered else 0.0,
+    }
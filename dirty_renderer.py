@@ -0,0 +1,28 @@
+import pygame
+
+
+class DirtyRenderer:
+    """Renders game frames by erasing and redrawing only moving sprites, updating just the changed screen areas"""
+    def __init__(self, maze):
+        self.maze = maze
+        self.last_rects = []    # areas covered by sprites in the previous frame
+        self.full_redraw = True
+
+    def request_full_redraw(self):
+        """Make the next rendered frame redraw and flip the whole screen"""
+        self.full_redraw = True
+
+    def render(self, draw_sprites):
+        """Render a frame, where draw_sprites draws all moving parts and returns the areas it drew"""
+        if self.full_redraw or self.maze.background is None:
+            self.maze.blit_background()
+            self.maze.collect_dirty_rects()     # already included in the full redraw
+            self.last_rects = draw_sprites()
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            changed = self.last_rects + self.maze.collect_dirty_rects()
+            for rect in changed:
+                self.maze.blit_background(rect)     # erase sprites from their previous positions
+            self.last_rects = draw_sprites()
+            pygame.display.update(changed + self.last_rects)
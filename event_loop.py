@@ -4,15 +4,35 @@ from sys import exit
 
 class EventLoop:
     """Contains the logic for checking events in a game loop"""
-    def __init__(self, loop_running=False, actions=None):
+    def __init__(self, loop_running=False, actions=None, record_log=None, replay_log=None, unrecorded_keys=()):
         self.action_map = {pygame.QUIT: exit, }
         if isinstance(actions, dict):
             self.action_map.update(actions)     # add custom actions, if provided
         self.loop_running = loop_running
+        self.record_log = record_log    # InputLog to write handled events to, frame by frame
+        self.replay_log = replay_log    # InputLog to take events from instead of live input
+        self.unrecorded_keys = unrecorded_keys  # keys outside of gameplay (e.g. debug overlays), never recorded
+        self.frame = 0
+
+    def get_events(self):
+        """Return this frame's events, from pygame or from the replay log, recording them if needed"""
+        events = pygame.event.get()
+        if self.replay_log:
+            events = [e for e in events if e.type == pygame.QUIT]   # live input is ignored, except for quitting
+            if self.frame >= self.replay_log.frames:
+                self.loop_running = False   # replay finished
+            else:
+                events += self.replay_log.get_events(self.frame)
+        elif self.record_log:
+            self.record_log.record(self.frame, [e for e in events if e.type in self.action_map and
+                                                e.type != pygame.QUIT and
+                                                getattr(e, 'key', None) not in self.unrecorded_keys])
+        self.frame += 1
+        return events
 
     def check_events(self):
         """Check events to see if any match mapped actions"""
-        for event in pygame.event.get():
+        for event in self.get_events():
             if event.type == pygame.QUIT:
                 self.action_map[event.type]()   # quit game with no argument passed
             elif event.type in self.action_map:
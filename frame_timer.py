@@ -0,0 +1,129 @@
+import os
+import pygame
+from collections import deque
+from time import perf_counter
+from text_cache import TextCache
+
+
+class FrameTimer:
+    """Times each phase of the game loop and displays rolling averages and a frame time graph as an overlay"""
+    ENV_VAR = 'PACMAN_FRAME_HUD'
+    TEXT_COLOR = (0, 255, 0)
+    GRAPH_COLOR = (0, 160, 255)
+    TARGET_COLOR = (255, 64, 64)
+    TARGET_FRAME = 1000 / 60    # milliseconds per frame at 60 fps
+
+    def __init__(self, screen, pos=(4, 4), history=120, refresh=15):
+        self.screen = screen
+        self.pos = pos
+        self.enabled = os.environ.get(FrameTimer.ENV_VAR, '') not in ('', '0')
+        self.font = TextCache.get_font(None, 18)
+        self.history = deque(maxlen=history)    # (frame milliseconds, {phase: milliseconds}) for recent frames
+        self.phases = {}    # phase timings for the frame in progress
+        self.frame_start = None
+        self.last_mark = None
+        self.refresh = refresh  # frames between re-rendering the overlay
+        self.frames_since_refresh = refresh
+        self.overlay = None
+        self.overlay_rect = None
+
+    def toggle(self):
+        """Turn the timer and its overlay on or off"""
+        self.enabled = not self.enabled
+        self.history.clear()
+        self.frame_start = None
+        self.frames_since_refresh = self.refresh
+
+    def begin_frame(self):
+        """Finish timing the previous frame and start timing a new one"""
+        if not self.enabled:
+            return
+        now = perf_counter()
+        if self.frame_start is not None:
+            self.history.append(((now - self.frame_start) * 1000, self.phases))
+        self.phases = {}
+        self.frame_start = self.last_mark = now
+
+    def mark(self, phase):
+        """Attribute the time since the previous mark (or the frame start) to a phase"""
+        if not self.enabled or self.frame_start is None:
+            return
+        now = perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0) + (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def averages(self):
+        """Return the average frame time and the average time of each phase over the recent frames"""
+        if not self.history:
+            return 0.0, {}
+        totals = {}
+        for _, phases in self.history:
+            for phase, millis in phases.items():
+                totals[phase] = totals.get(phase, 0) + millis
+        frame_avg = sum(frame for frame, _ in self.history) / len(self.history)
+        return frame_avg, {phase: total / len(self.history) for phase, total in totals.items()}
+
+    def prep_overlay(self):
+        """Render the averages and the frame time graph onto the overlay surface"""
+        frame_avg, phase_avgs = self.averages()
+        lines = ['frame %.2f ms  %d fps' % (frame_avg, 1000 / frame_avg if frame_avg else 0)]
+        lines += ['%-12s %.2f' % (phase, millis) for phase, millis in phase_avgs.items()]
+        texts = [self.font.render(line, True, FrameTimer.TEXT_COLOR) for line in lines]
+        graph_w, graph_h = self.history.maxlen, 40
+        width = max([graph_w] + [t.get_width() for t in texts])
+        height = sum(t.get_height() for t in texts) + graph_h + 4
+        self.overlay = pygame.Surface((width, height))
+        y = 0
+        for text in texts:
+            self.overlay.blit(text, (0, y))
+            y += text.get_height()
+        y += 4
+        scale = graph_h / (FrameTimer.TARGET_FRAME * 2)     # graph tops out at 30 fps
+        for x, (frame, _) in enumerate(self.history):
+            bar = min(int(frame * scale), graph_h)
+            pygame.draw.line(self.overlay, FrameTimer.GRAPH_COLOR, (x, y + graph_h), (x, y + graph_h - bar))
+        target_y = y + graph_h - int(FrameTimer.TARGET_FRAME * scale)
+        pygame.draw.line(self.overlay, FrameTimer.TARGET_COLOR, (0, target_y), (graph_w, target_y))
+        self.overlay_rect = self.overlay.get_rect(topleft=self.pos)
+
+    def blit(self):
+        """Blit the overlay to the screen if enabled, returning the areas drawn"""
+        if not self.enabled:
+            return []
+        self.frames_since_refresh += 1
+        if self.frames_since_refresh >= self.refresh or self.overlay is None:
+            self.prep_overlay()
+            self.frames_since_refresh = 0
+        return [self.screen.blit(self.overlay, self.overlay_rect)]
+
+
+class StartupTimer:
+    """Times each phase of the game's startup, printing a report once startup is complete if enabled"""
+    ENV_VAR = 'PACMAN_STARTUP_REPORT'
+
+    def __init__(self):
+        self.enabled = os.environ.get(StartupTimer.ENV_VAR, '') not in ('', '0')
+        self.start = self.last_mark = perf_counter()
+        self.phases = []    # (phase, milliseconds taken, milliseconds since the start when it ended)
+        self.reported = False
+
+    def begin(self):
+        """Start timing a phase, leaving out the time since the previous mark"""
+        self.last_mark = perf_counter()
+
+    def mark(self, phase):
+        """Record the time since the previous mark (or begin) as a phase"""
+        now = perf_counter()
+        self.phases.append((phase, (now - self.last_mark) * 1000, (now - self.start) * 1000))
+        self.last_mark = now
+
+    def report(self):
+        """Mark startup as complete, printing the startup phases if enabled"""
+        if self.reported:
+            return
+        self.reported = True
+        if not self.enabled:
+            return
+        print('startup phase          ms    at ms')
+        for phase, millis, at in self.phases:
+            print('%-18s %8.1f %8.1f' % (phase, millis, at))
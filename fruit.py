@@ -5,7 +5,12 @@ from image_manager import ImageManager
 
 class Fruit(Block):
     """Inherits from maze.Block to represent a fruit available for pickup in the maze"""
-    def __init__(self, x, y, width, height):
-        images = ['apple.png', 'cherry.png', 'peach.png', 'strawberry.png']
-        fruit_image, _ = ImageManager(img=choice(images), resize=(width // 2, height // 2)).get_image()
-        super(Fruit, self).__init__(x, y, width, height, fruit_image)
+    IMAGE_FILES = ['apple.png', 'cherry.png', 'peach.png', 'strawberry.png']
+
+    def __init__(self, x, y, width, height, images):
+        super(Fruit, self).__init__(x, y, width, height, choice(images))
+
+    @staticmethod
+    def load_images(width, height):
+        """Load and scale every fruit image once, for choosing between when fruits are placed"""
+        return [ImageManager(img=f, resize=(width // 2, height // 2)).get_image()[0] for f in Fruit.IMAGE_FILES]
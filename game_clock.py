@@ -0,0 +1,35 @@
+import pygame
+
+
+class GameClock:
+    """Source of game time in milliseconds, a logical clock which only moves forward when the game advances it"""
+    ticks = 0
+    timers = {}     # event type -> [next fire time, interval]
+
+    @classmethod
+    def reset(cls, start=0):
+        """Set the clock back to a start time, cancelling every timer"""
+        cls.ticks = start
+        cls.timers.clear()
+
+    @classmethod
+    def get_ticks(cls):
+        """Return the current game time in milliseconds"""
+        return int(cls.ticks)
+
+    @classmethod
+    def set_timer(cls, event, millis):
+        """Repeatedly post an event every given number of milliseconds, or cancel it if millis is 0"""
+        if millis == 0:
+            cls.timers.pop(event, None)
+        else:
+            cls.timers[event] = [cls.ticks + millis, millis]
+
+    @classmethod
+    def advance(cls, millis):
+        """Move the clock forward, posting any timer events that have come due"""
+        cls.ticks += millis
+        for event, timer in list(cls.timers.items()):
+            if cls.ticks >= timer[0]:
+                timer[0] += timer[1]
+                pygame.event.post(pygame.event.Event(event))
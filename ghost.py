@@ -1,11 +1,16 @@
-from pygame import time, sysfont
-from pygame.sprite import Sprite, spritecollideany
+from pygame.sprite import Sprite
 from image_manager import ImageManager
+from maze import TileGrid
+from path_finder import PathFinder
+from nav_graph import NavGraph
+from game_clock import GameClock
+from text_cache import TextCache
 
 
 class Ghost(Sprite):
     """Represents the enemies of PacMan which chase him around the maze"""
     GHOST_AUDIO_CHANNEL = 1
+    eye_atlases = {}    # (ghost file, size) -> {eye direction: body frames with those eyes drawn on}
 
     def __init__(self, screen, maze, target, spawn_info, sound_manager, ghost_file='ghost-red.png'):
         super().__init__()
@@ -28,12 +33,14 @@ class Ghost(Sprite):
                                                                             (0, 32, 32, 32), (32, 32, 32, 32)],
                                  resize=(self.maze.block_size, self.maze.block_size),
                                  keys=['r', 'u', 'd', 'l'])
-        self.score_font = sysfont.SysFont(None, 22)
+        self.score_font = TextCache.get_font(None, 22)
         self.score_image = None
-        self.image, self.rect = self.norm_images.get_image()
-        self.curr_eye, _ = self.eyes.get_image(key='r')    # default eye to looking right
-        self.image.blit(self.curr_eye, (0, 0))  # combine eyes and body
+        self.eye_frames = Ghost.get_eye_atlas(ghost_file, self.norm_images, self.eyes)
+        _, self.rect = self.norm_images.get_image()
+        self.change_eyes('r')   # default eye to looking right
         self.return_tile = spawn_info[0]    # spawn tile
+        PathFinder.for_map(self.internal_map).get_table(self.return_tile)  # precompute paths back to spawn
+        self.nav = NavGraph.for_map(self.internal_map)
         self.return_path = None     # path back to spawn tile
         self.return_delay = 1000    # 1 second delay from being eaten to returning
         self.eaten_time = None   # timestamp for being eaten
@@ -47,46 +54,29 @@ class Ghost(Sprite):
         self.blue_interval = 5000   # 5 second time limit for blue status
         self.blue_start = None  # timestamp for blue status start
         self.blink = False
-        self.last_blink = time.get_ticks()
+        self.last_blink = GameClock.get_ticks()
         self.blink_interval = 250
 
+    @staticmethod
+    def get_eye_atlas(ghost_file, body_images, eye_images):
+        """Return every body frame combined with every eye direction, composed once per ghost file and size"""
+        key = (ghost_file, body_images.rect.size)
+        if key not in Ghost.eye_atlases:
+            atlas = {}
+            for direction in ('r', 'u', 'd', 'l'):
+                eye, _ = eye_images.get_image(key=direction)
+                atlas[direction] = []
+                for body in body_images.all_images():
+                    frame = body.copy()
+                    frame.blit(eye, (0, 0))     # combine eyes and body
+                    atlas[direction].append(frame)
+            Ghost.eye_atlases[key] = atlas
+        return Ghost.eye_atlases[key]
+
     @staticmethod
     def find_path(maze_map, start, target):
-        """Determine a path in the maze map from the start to the target tile"""
-        path = []   # path list
-        tried = set()   # set for faster membership checks
-        done = False
-        curr_tile = start
-        while not done:
-            if curr_tile == target:
-                done = True     # if at target tile, we are done
-            else:
-                options = [     # possible moves
-                    (curr_tile[0] + 1, curr_tile[1]),
-                    (curr_tile[0] - 1, curr_tile[1]),
-                    (curr_tile[0], curr_tile[1] + 1),
-                    (curr_tile[0], curr_tile[1] - 1)
-                ]
-                test = (abs(target[0] - start[0]), abs(target[1] - start[0]))
-                prefer = test.index(max(test[0], test[1]))
-                if prefer == 0:
-                    options.sort(key=lambda x: x[0], reverse=True)
-                else:
-                    options.sort(key=lambda x: x[1], reverse=True)
-                backtrack = True    # assume we must backtrack
-                for opt in options:
-                    try:
-                        if maze_map[opt[0]][opt[1]] not in ('x', ) and opt not in tried:
-                            backtrack = False   # if we haven't tried this option before, and it's not blocked
-                            path.append(opt)    # then add to the path, and remember that it's been tried
-                            tried.add(opt)
-                            curr_tile = opt
-                            break
-                    except IndexError:
-                        continue
-                if backtrack:   # backtrack to the previous position in the path
-                    curr_tile = path.pop()
-        return path
+        """Determine the shortest path in the maze map from the start to the target tile"""
+        return PathFinder.for_map(maze_map).find_path(start, target)
 
     def increase_speed(self):
         """Increase the ghost's speed"""
@@ -125,51 +115,35 @@ class Ghost(Sprite):
         self.tile = (self.get_nearest_row(), self.get_nearest_col())
         self.return_path = Ghost.find_path(self.internal_map, self.tile, self.return_tile)
         self.direction = self.get_dir_from_path()
-        self.image = self.score_font.render('200', True, (255, 255, 255))
-        self.eaten_time = time.get_ticks()
+        self.image = TextCache.render_number(self.score_font, 200, (255, 255, 255))
+        self.eaten_time = GameClock.get_ticks()
 
-    def get_direction_options(self):
+    def get_direction_options(self, directions=('u', 'l', 'd', 'r')):
         """Check if the ghost is blocked by any maze barriers and return all directions possible to move in"""
-        tests = {
-            'u': self.rect.move((0, -self.speed)),
-            'l': self.rect.move((-self.speed, 0)),
-            'd': self.rect.move((0, self.speed)),
-            'r': self.rect.move((self.speed, 0))
-        }
-        remove = []
-        original_pos = self.rect
-
-        for d, t in tests.items():
-            self.rect = t   # temporarily move self
-            if spritecollideany(self, self.maze.maze_blocks) and d not in remove:
-                remove.append(d)    # if collision, mark this direction for removal
-            if spritecollideany(self, self.target.portal_controller.blue_portal) and d not in remove:
-                remove.append(d)
-            if spritecollideany(self, self.target.portal_controller.orange_portal) and d not in remove:
-                remove.append(d)
-        for rem in remove:
-            del tests[rem]
-        self.rect = original_pos    # reset position
-        return list(tests.keys())
+        barriers = TileGrid.WALL | TileGrid.PORTAL
+        return [d for d in directions
+                if self.maze.grid.can_move(self.rect, d, self.speed, barriers)]
 
     def begin_blue_state(self):
         """Switch the ghost to its blue state"""
         if not self.state['return']:
             self.state['blue'] = True
             self.image, _ = self.blue_images.get_image()
-            self.blue_start = time.get_ticks()
+            self.blue_start = GameClock.get_ticks()
             self.sound_manager.stop()
             self.sound_manager.play_loop('blue')
 
     def change_eyes(self, look_direction):
         """Change the ghosts' eyes to look in the given direction"""
-        self.image, _ = self.norm_images.get_image()
-        self.curr_eye, _ = self.eyes.get_image(key=look_direction)
-        self.image.blit(self.curr_eye, (0, 0))  # combine eyes and body
+        self.image = self.eye_frames[look_direction][self.norm_images.frame_position()]
 
     def get_chase_direction(self, options):
         """Figure out a new direction to chase in based on the target and walls"""
-        pick_direction = None
+        self.maze.flow_field.update(self.target.tile)
+        pick_direction = self.maze.flow_field.pick(self.tile, [d for d in ('u', 'l', 'r', 'd') if d in options],
+                                                     heading=self.direction)
+        if pick_direction:  # shortest way to the target through the maze
+            return pick_direction
         target_pos = (self.target.rect.centerx, self.target.rect.centery)
         test = (abs(target_pos[0]), abs(target_pos[1]))
         prefer = test.index(max(test[0], test[1]))
@@ -197,7 +171,10 @@ class Ghost(Sprite):
 
     def get_flee_direction(self, options):
         """Figure out a new direction to flee in based on the target and walls"""
-        pick_direction = None
+        self.maze.flow_field.update(self.target.tile)
+        pick_direction = self.maze.flow_field.pick(self.tile, options, toward=False, heading=self.direction)
+        if pick_direction:  # farthest way from the target through the maze
+            return pick_direction
         target_pos = (self.target.rect.centerx, self.target.rect.centery)
         test = (abs(target_pos[0]), abs(target_pos[1]))
         prefer = test.index(max(test[0], test[1]))
@@ -233,17 +210,8 @@ class Ghost(Sprite):
 
     def is_at_intersection(self):
         """Return True if the ghost is at an intersection, False if not"""
-        directions = 0
         self.tile = (self.get_nearest_row(), self.get_nearest_col())
-        if self.internal_map[self.tile[0] - 1][self.tile[1]] not in ('x', ):
-            directions += 1
-        if self.internal_map[self.tile[0] + 1][self.tile[1]] not in ('x', ):
-            directions += 1
-        if self.internal_map[self.tile[0]][self.tile[1] - 1] not in ('x', ):
-            directions += 1
-        if self.internal_map[self.tile[0]][self.tile[1] + 1] not in ('x', ):
-            directions += 1
-        return True if directions > 2 else False
+        return self.nav.is_junction(self.tile)
 
     def enable(self):
         """Initialize ghost AI with the first available direction"""
@@ -260,14 +228,14 @@ class Ghost(Sprite):
         self.return_path = None     # remove path
         if self.state['blue']:
             self.stop_blue_state(resume_audio=False)
-        self.image, _ = self.norm_images.get_image()    # reset image
+        self.change_eyes('r')   # reset image
         self.sound_manager.stop()
 
     def stop_blue_state(self, resume_audio=True):
         """Revert back from blue state"""
         self.state['blue'] = False
         self.state['return'] = False
-        self.image, _ = self.norm_images.get_image()
+        self.change_eyes(self.direction or 'r')
         self.sound_manager.stop()
         if resume_audio:
             self.sound_manager.play_loop('std')
@@ -282,11 +250,8 @@ class Ghost(Sprite):
                 return '*'  # signal that the path is complete
         return None
 
-    def update_normal(self):
-        """Update logic for a normal state"""
-        options = self.get_direction_options()
-        if self.is_at_intersection() or self.last_position == (self.rect.centerx, self.rect.centery):
-            self.direction = self.get_chase_direction(options)
+    def move(self, options):
+        """Move one step in the current direction, if it is one of the open options"""
         if self.direction == 'u' and 'u' in options:
             self.rect.centery -= self.speed
         elif self.direction == 'l' and 'l' in options:
@@ -295,37 +260,50 @@ class Ghost(Sprite):
             self.rect.centery += self.speed
         elif self.direction == 'r' and 'r' in options:
             self.rect.centerx += self.speed
+
+    def get_move_options(self):
+        """Return the open directions the ghost should consider, all of them only when it may pick a new one"""
+        if self.is_at_intersection() or self.last_position == (self.rect.centerx, self.rect.centery):
+            return self.get_direction_options(), True
+        return self.get_direction_options((self.direction, ) if self.direction else ()), False
+
+    def update_normal(self):
+        """Update logic for a normal state"""
+        options, deciding = self.get_move_options()
+        if deciding:
+            self.direction = self.get_chase_direction(options)
+        self.move(options)
+        self.animate_normal()
+
+    def animate_normal(self):
+        """Advance the body animation and look in the current direction"""
+        self.norm_images.next_image()
         self.change_eyes(self.direction or 'r')  # default look direction to right
-        self.image = self.norm_images.next_image()
 
     def update_blue(self):
         """Update logic for blue state"""
-        self.image = self.blue_images.next_image()
-        options = self.get_direction_options()
-        if self.is_at_intersection() or self.last_position == (self.rect.centerx, self.rect.centery):
+        options, deciding = self.get_move_options()
+        if deciding:
             self.direction = self.get_flee_direction(options)
-        # print(self.internal_map[self.tile[0]][self.tile[1]])
-        if self.direction == 'u' and 'u' in options:
-            self.rect.centery -= self.speed
-        elif self.direction == 'l' and 'l' in options:
-            self.rect.centerx -= self.speed
-        elif self.direction == 'd' and 'd' in options:
-            self.rect.centery += self.speed
-        elif self.direction == 'r' and 'r' in options:
-            self.rect.centerx += self.speed
-        if abs(self.blue_start - time.get_ticks()) > self.blue_interval:
+        self.move(options)
+        self.animate_blue()
+
+    def animate_blue(self):
+        """Advance the blue animation, blinking and then leaving the blue state as its time runs out"""
+        self.image = self.blue_images.next_image()
+        if abs(self.blue_start - GameClock.get_ticks()) > self.blue_interval:
             self.stop_blue_state()
-        elif abs(self.blue_start - time.get_ticks()) > int(self.blue_interval * 0.5):
+        elif abs(self.blue_start - GameClock.get_ticks()) > int(self.blue_interval * 0.5):
             if self.blink:
                 self.image = self.blue_warnings.next_image()
                 self.blink = False
-                self.last_blink = time.get_ticks()
-            elif abs(self.last_blink - time.get_ticks()) > self.blink_interval:
+                self.last_blink = GameClock.get_ticks()
+            elif abs(self.last_blink - GameClock.get_ticks()) > self.blink_interval:
                 self.blink = True
 
     def update_return(self):
         """Update logic for when returning to ghost spawn"""
-        if abs(self.eaten_time - time.get_ticks()) > self.return_delay:
+        if abs(self.eaten_time - GameClock.get_ticks()) > self.return_delay:
             self.image, _ = self.eyes.get_image(key=self.direction)
             test = self.check_path_tile()
             if test == '*':
@@ -354,5 +332,5 @@ class Ghost(Sprite):
             self.last_position = (self.rect.centerx, self.rect.centery)
 
     def blit(self):
-        """Blit ghost image to the screen"""
-        self.screen.blit(self.image, self.rect)
+        """Blit ghost image to the screen, returning the area drawn"""
+        return self.screen.blit(self.image, self.rect)
@@ -0,0 +1,176 @@
+try:
+    import numpy as np
+except ImportError:     # the engine is optional, ghosts update themselves one by one without it
+    np = None
+from maze import TileGrid
+from nav_graph import NavGraph
+
+
+class GhostEngine:
+    """Moves every ghost in its normal or blue state at once, using NumPy arrays of positions, directions,
+    speeds and states checked against the maze grid. Ghost sprites keep their animation, timers and drawing."""
+
+    DIRECTIONS = ('u', 'l', 'd', 'r')
+    CODES = {None: -1, 'u': 0, 'l': 1, 'd': 2, 'r': 3}
+    UP, LEFT, DOWN, RIGHT = range(4)
+    NONE = -1
+    STEPS = tuple(TileGrid.DIRECTIONS[d] for d in DIRECTIONS)  # (dx, dy) for each direction
+    UNREACHABLE = -1
+    FALLBACKS = ((UP, LEFT, RIGHT, DOWN),   # tried in order when chasing and the preferred direction is closed
+                 (UP, LEFT, DOWN, RIGHT))   # the same when fleeing
+    BARRIERS = TileGrid.WALL | TileGrid.PORTAL
+
+    def __init__(self, maze, ghosts):
+        self.maze = maze
+        self.ghosts = list(ghosts)
+        self.steps = np.array(GhostEngine.STEPS)
+        self.fallbacks = np.array(GhostEngine.FALLBACKS)
+        self.junctions = GhostEngine.build_junctions(NavGraph.for_map(maze.map_lines))
+        self.flags = None   # padded 2D copy of the grid flags
+        self.flags_version = None
+        self.distances = None   # padded 2D copy of the flow field toward the target
+        self.distances_version = None
+
+    @staticmethod
+    def available():
+        """Return True if NumPy can be imported, so the engine can be used"""
+        return np is not None
+
+    @staticmethod
+    def build_junctions(nav):
+        """Return a 2D array marking the junction tiles of a navigation graph"""
+        maze_map = nav.finder.maze_map
+        junctions = np.zeros((len(maze_map), max(len(line) for line in maze_map) + 1), dtype=bool)
+        for row, col in nav.junctions:
+            junctions[row, col] = True
+        return junctions
+
+    def get_flags(self):
+        """Return the grid flags as a 2D array, copying the grid again only if it has changed"""
+        grid = self.maze.grid
+        if self.flags_version != grid.version:
+            self.flags = np.zeros((len(grid.cells), max(len(row) for row in grid.cells)), dtype=np.uint8)
+            for i, row in enumerate(grid.cells):
+                self.flags[i, :len(row)] = np.frombuffer(row, dtype=np.uint8)
+            self.flags_version = grid.version
+        return self.flags
+
+    def get_distances(self):
+        """Return the maze flow field as a 2D array, copying it again only if it has been rebuilt"""
+        field = self.maze.flow_field
+        if self.distances_version != field.version:
+            flags = self.get_flags()
+            self.distances = np.full(flags.shape, GhostEngine.UNREACHABLE, dtype=np.int32)
+            for (row, col), distance in field.distances.items():
+                if 0 <= row < flags.shape[0] and 0 <= col < flags.shape[1]:
+                    self.distances[row, col] = distance
+            self.distances_version = field.version
+        return self.distances
+
+    @staticmethod
+    def lookup(table, rows, cols, outside=0):
+        """Index a 2D table with arrays of tiles, giving the outside value for tiles outside of it"""
+        height, width = table.shape
+        inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        return np.where(inside, table[np.minimum(np.maximum(rows, 0), height - 1),
+                                      np.minimum(np.maximum(cols, 0), width - 1)], outside)
+
+    @staticmethod
+    def round_coordinates(values):
+        """Round to whole pixels the way pygame.Rect attribute setters do, with halves away from zero"""
+        return np.copysign(np.floor(np.abs(values) + 0.5), values).astype(int)
+
+    def collides(self, left, top, width, height):
+        """Return which rects overlap a barrier tile, for arrays of rects of any matching shape"""
+        grid = self.maze.grid
+        flags = self.get_flags()
+        top_row, left_col = (top - grid.y_start) // grid.block_size, (left - grid.x_start) // grid.block_size
+        bottom_row = (top + height - 1 - grid.y_start) // grid.block_size
+        right_col = (left + width - 1 - grid.x_start) // grid.block_size
+        result = np.zeros(left.shape, dtype=bool)
+        for i in range(int((bottom_row - top_row).max()) + 1):
+            for j in range(int((right_col - left_col).max()) + 1):
+                hit = GhostEngine.lookup(flags, top_row + i, left_col + j) & GhostEngine.BARRIERS
+                result |= (hit > 0) & (top_row + i <= bottom_row) & (left_col + j <= right_col)
+        return result
+
+    def update(self, target):
+        """Update every enabled ghost, moving all normal and blue ghosts together"""
+        active = [g for g in self.ghosts if g.state['enabled']]
+        movers = [g for g in active if g.state['blue'] or not g.state['return']]
+        for g in active:
+            if g.state['return'] and not g.state['blue']:
+                g.update_return()   # path following back to spawn stays per ghost
+        if movers:
+            self.move(movers, target)
+        for g in active:
+            g.last_position = (g.rect.centerx, g.rect.centery)
+
+    def move(self, ghosts, target):
+        """Pick directions for and move the given normal and blue ghosts"""
+        grid = self.maze.grid
+        index = np.arange(len(ghosts))
+        codes = GhostEngine.CODES
+        left, top, width, height, direction, blue, last_x, last_y = np.array(
+            [(*g.rect, codes[g.direction], g.state['blue'], *(g.last_position or (-1, -1))) for g in ghosts]).T
+        blue = blue.astype(bool)
+        speed = np.array([g.speed for g in ghosts])
+        center_x, center_y = left + width // 2, top + height // 2
+
+        # open directions, testing each rect moved by its speed (truncated, as pygame.Rect.move does)
+        offsets = np.trunc(self.steps[None, :, :] * speed[:, None, None]).astype(int)
+        options = ~self.collides(left[:, None] + offsets[:, :, 0], top[:, None] + offsets[:, :, 1],
+                                 width[:, None], height[:, None])
+
+        # new directions are only picked at junctions or when stuck
+        rows, cols = (top - grid.y_start) // grid.block_size, (left - grid.x_start) // grid.block_size
+        decide = GhostEngine.lookup(self.junctions, rows, cols).astype(bool)
+        decide |= (last_x == center_x) & (last_y == center_y)
+
+        # head towards the target along its larger screen coordinate, or away from it when blue
+        target_x, target_y = target.rect.centerx, target.rect.centery
+        if abs(target_x) >= abs(target_y):
+            toward = np.where(target_x < center_x, GhostEngine.LEFT,
+                              np.where(target_x > center_x, GhostEngine.RIGHT, GhostEngine.NONE))
+            away = np.where(toward == GhostEngine.NONE, GhostEngine.NONE,
+                            (GhostEngine.LEFT + GhostEngine.RIGHT) - toward)
+        else:
+            toward = np.where(target_y < center_y, GhostEngine.UP,
+                              np.where(target_y > center_y, GhostEngine.DOWN, GhostEngine.NONE))
+            away = np.where(toward == GhostEngine.NONE, GhostEngine.NONE,
+                            (GhostEngine.UP + GhostEngine.DOWN) - toward)
+        pick = np.where(blue, away, toward)
+        pick_open = (pick != GhostEngine.NONE) & options[index, np.maximum(pick, 0)]
+        order = self.fallbacks[blue.astype(int)]
+        order_open = options[index[:, None], order]
+        fallback = np.where(order_open.any(axis=1), order[index, order_open.argmax(axis=1)], GhostEngine.NONE)
+        pick = np.where(pick_open, pick, fallback)
+
+        # but prefer the shortest way to (or longest way from) the target through the maze, by the flow field,
+        # never turning back (codes two apart are opposite directions)
+        self.maze.flow_field.update(target.tile)
+        distances = GhostEngine.lookup(self.get_distances(), rows[:, None] + self.steps[order][:, :, 1],
+                                       cols[:, None] + self.steps[order][:, :, 0], GhostEngine.UNREACHABLE)
+        back = np.where(direction == GhostEngine.NONE, GhostEngine.NONE, (direction + 2) % 4)
+        reachable = order_open & (distances != GhostEngine.UNREACHABLE) & (order != back[:, None])
+        nearest = np.where(reachable, distances, np.iinfo(np.int32).max).argmin(axis=1)
+        farthest = np.where(reachable, distances, GhostEngine.UNREACHABLE).argmax(axis=1)
+        flow = order[index, np.where(blue, farthest, nearest)]
+        direction = np.where(decide, np.where(reachable.any(axis=1), flow, pick), direction)
+
+        # step the centers (rounded, as pygame.Rect center setters do) in open directions
+        moving = (direction != GhostEngine.NONE) & options[index, np.maximum(direction, 0)]
+        step = self.steps[np.maximum(direction, 0)] * speed[:, None]
+        new_x = np.where(moving, GhostEngine.round_coordinates(center_x + step[:, 0]), center_x)
+        new_y = np.where(moving, GhostEngine.round_coordinates(center_y + step[:, 1]), center_y)
+
+        directions = GhostEngine.DIRECTIONS + (None, )   # so NONE indexes to None
+        for g, x, y, d, row, col in zip(ghosts, (new_x - width // 2).tolist(), (new_y - height // 2).tolist(),
+                                        direction.tolist(), rows.tolist(), cols.tolist()):
+            g.rect.topleft = (x, y)
+            g.direction = directions[d]
+            g.tile = (row, col)
+            if g.state['blue']:
+                g.animate_blue()
+            else:
+                g.animate_normal()
@@ -1,52 +1,118 @@
+import os
+import threading
 import pygame
+from game_clock import GameClock
 
 
 class ImageManager:
     """Provides methods and logic for managing a pygame image or sprite sheet"""
+    ORIENTATIONS = [(False, False), (True, False), (False, True), (True, True)]     # (x flip, y flip)
+    file_cache = {}     # image file -> loaded surface, shared by all image managers
+    frame_cache = {}    # (file, offsets, resize, convert, transparency) -> prepared frame surfaces
+    variant_cache = {}  # frame cache key -> frames for every orientation
+    loader = None   # background thread reading image files into the file cache, once started
+
     def __init__(self, img, sheet=False, pos_offsets=None,
                  resize=None, keys=None,
                  convert=True, transparency=True,
                  animation_delay=None, reversible=False,
                  repeat=True):
+        self.frame_key = (img, tuple(tuple(rect) for rect in pos_offsets) if sheet else None,
+                          tuple(resize) if resize else None, convert, transparency)
+        if self.frame_key not in ImageManager.frame_cache:
+            ImageManager.frame_cache[self.frame_key] = ImageManager.load_frames(img, sheet, pos_offsets, resize,
+                                                                                convert, transparency)
+        self.frames = ImageManager.frame_cache[self.frame_key]
+        self.rect = self.frames[0].get_rect()
+        if keys and not len(keys) == len(self.frames):
+            raise ValueError('Must provide same number of keys as images')
+        self.keys = keys    # if keys provided, use keys instead of index value for getting images
+        self.orientation = (False, False)
+        self.variants = {self.orientation: self.arrange(self.frames)}   # images for each orientation used
+        self.images = self.variants[self.orientation]
+        if not keys:
+            self.image_index = 0
+        self.reverse_order = False  # reversible animations play their frames backwards every other pass
+        self.animation_delay = animation_delay
+        self.time_stamp = GameClock.get_ticks()
+        self.reversible = reversible
+        self.repeat = repeat
+
+    @staticmethod
+    def load_image(img):
+        """Load an image file from the images directory, reusing it if it has been loaded before"""
+        if img not in ImageManager.file_cache:
+            ImageManager.file_cache[img] = pygame.image.load('images/' + img)
+        return ImageManager.file_cache[img]
+
+    @staticmethod
+    def load_all(images):
+        """Load image files into the file cache"""
+        for img in images:
+            ImageManager.load_image(img)
+
+    @staticmethod
+    def preload(images=None):
+        """Start reading image files (by default every image in the images directory) on a background thread,
+        so managers created later find them already loaded. Frames are still prepared where they are first used,
+        since converting them needs the display."""
+        if ImageManager.loader:
+            return
+        if images is None:
+            images = sorted(f for f in os.listdir('images') if f.endswith('.png'))
+        ImageManager.loader = threading.Thread(target=ImageManager.load_all, args=(images, ), daemon=True)
+        ImageManager.loader.start()
+
+    @staticmethod
+    def load_frames(img, sheet, pos_offsets, resize, convert, transparency):
+        """Load, extract, resize and convert the frames of an image or sprite sheet"""
         if not sheet:
-            self.images = [pygame.image.load('images/' + img)]  # single image
-        else:
-            self.sheet = pygame.image.load('images/' + img)
-            self.pos_offsets = pos_offsets  # get images from sprite sheet, using offsets
-            self.images = self.extract_images()
+            images = [ImageManager.load_image(img).copy()]  # single image, copied so the loaded file is unaltered
+        else:   # get images from sprite sheet, using offsets
+            images = ImageManager.extract_images(ImageManager.load_image(img), pos_offsets)
         if resize:  # apply resizing
-            self.images = [pygame.transform.scale(img, resize) for img in self.images]
-        self.rect = self.images[0].get_rect()
+            images = [pygame.transform.scale(i, resize) for i in images]
         if convert:
-            self.images = [img.convert() for img in self.images]
+            images = [i.convert() for i in images]
         if transparency:
-            for i in self.images:
+            for i in images:
                 i.set_colorkey((0, 0, 0, 0))
-        if keys:    # if keys provided, use keys instead of index value for getting images
-            if not len(keys) == len(self.images):
-                raise ValueError('Must provide same number of keys as images')
-            images_dict = dict()
-            for k, i in zip(keys, range(len(self.images))):
-                images_dict[k] = self.images[i]
-            self.images = images_dict
+        return images
+
+    def arrange(self, frames):
+        """Return frames as a dictionary by key if this manager uses keys, otherwise as a list"""
+        if self.keys:
+            return dict(zip(self.keys, frames))
+        return frames
+
+    def build_variants(self):
+        """Precompute the images for every orientation (original, flipped horizontally, flipped vertically,
+        and both, i.e. rotated 180 degrees), shared between managers"""
+        if self.frame_key in ImageManager.variant_cache:
+            variants = ImageManager.variant_cache[self.frame_key]
         else:
-            self.image_index = 0
-        self.animation_delay = animation_delay
-        self.time_stamp = pygame.time.get_ticks()
-        self.reversible = reversible
-        self.repeat = repeat
+            variants = {o: [pygame.transform.flip(f, *o) for f in self.frames] for o in ImageManager.ORIENTATIONS[1:]}
+            variants[ImageManager.ORIENTATIONS[0]] = self.frames
+            ImageManager.variant_cache[self.frame_key] = variants
+        self.variants = {o: self.arrange(frames) for o, frames in variants.items()}
 
     def flip(self, x_bool=True, y_bool=False):
         """Flip images in the y, x, or both directions"""
-        if isinstance(self.images, dict):
-            self.images = {v: pygame.transform.flip(v, x_bool, y_bool) for k, v in self.images.items()}
-        else:
-            self.images = [pygame.transform.flip(x, x_bool, y_bool) for x in self.images]
+        self.orientation = (self.orientation[0] != x_bool, self.orientation[1] != y_bool)
+        if self.orientation not in self.variants:
+            self.build_variants()
+        self.images = self.variants[self.orientation]
+
+    def frame_position(self):
+        """Return the list position of the current image, accounting for reversed playback"""
+        if self.reverse_order:
+            return len(self.images) - 1 - self.image_index
+        return self.image_index
 
     def get_image(self, key=None):
         """Returns image information that is useful for displaying the image"""
         if isinstance(self.images, list):
-            return self.images[self.image_index], self.rect
+            return self.images[self.frame_position()], self.rect
         else:
             if not key:
                 raise KeyError('No image key provided')
@@ -61,26 +127,27 @@ class ImageManager:
         if not isinstance(self.images, list):
             raise ValueError('next_image not callable when using keys')
         if not self.repeat and self.image_index + 1 >= len(self.images):
-            return self.images[self.image_index]
+            return self.images[self.frame_position()]
         if self.reversible and self.image_index + 1 >= len(self.images):
-            self.images.reverse()
+            self.reverse_order = not self.reverse_order
         if not self.animation_delay:
             self.image_index = (self.image_index + 1) % len(self.images)
         else:
-            if abs(self.time_stamp - pygame.time.get_ticks()) > self.animation_delay:
+            if abs(self.time_stamp - GameClock.get_ticks()) > self.animation_delay:
                 self.image_index = (self.image_index + 1) % len(self.images)
-                self.time_stamp = pygame.time.get_ticks()
+                self.time_stamp = GameClock.get_ticks()
 
-        return self.images[self.image_index]
+        return self.images[self.frame_position()]
 
-    def extract_images(self):
+    @staticmethod
+    def extract_images(sheet, pos_offsets):
         """Extract a list of images from their respective positions and offsets in a sprite sheet"""
-        if not self.sheet:
+        if not sheet:
             raise ValueError('Image manager has no sprite sheet to extract images from')
         result = []
-        for rect in self.pos_offsets:
+        for rect in pos_offsets:
             select = pygame.Rect(rect)
             sub_image = pygame.Surface(select.size).convert(pygame.display.get_surface())
-            sub_image.blit(self.sheet, (0, 0), select)
+            sub_image.blit(sheet, (0, 0), select)
             result.append(sub_image)
         return result
@@ -0,0 +1,37 @@
+import json
+import pygame
+
+
+class InputLog:
+    """A per-frame log of the events handled by a game's event loop, along with the game's random seed"""
+    def __init__(self, seed, step_time, frames=0, events=None):
+        self.seed = seed
+        self.step_time = step_time  # logical milliseconds per frame while recording
+        self.frames = frames
+        self.events = {}    # frame number -> [(event type, key or None), ...]
+        for frame, e_type, key in events or []:
+            self.events.setdefault(frame, []).append((e_type, key))
+
+    def record(self, frame, events):
+        """Add the events handled on a frame to the log"""
+        if events:
+            self.events[frame] = [(e.type, getattr(e, 'key', None)) for e in events]
+        self.frames = max(self.frames, frame + 1)
+
+    def get_events(self, frame):
+        """Return the logged events for a frame as pygame events"""
+        return [pygame.event.Event(e_type) if key is None else pygame.event.Event(e_type, key=key)
+                for e_type, key in self.events.get(frame, [])]
+
+    def save(self, path):
+        """Write the log to a JSON file"""
+        events = [[frame, e_type, key] for frame in sorted(self.events) for e_type, key in self.events[frame]]
+        with open(path, 'w') as file:
+            json.dump({'seed': self.seed, 'step_time': self.step_time, 'frames': self.frames, 'events': events}, file)
+
+    @staticmethod
+    def load(path):
+        """Read a log from a JSON file"""
+        with open(path, 'r') as file:
+            data = json.load(file)
+        return InputLog(data['seed'], data['step_time'], data['frames'], data['events'])
@@ -1,10 +1,15 @@
 import pygame
+from functools import partial
 from image_manager import ImageManager
 from score import ScoreBoard
+from game_clock import GameClock
+from text_cache import TextCache
 
 
 class SimpleAnimation(pygame.sprite.Sprite):
     """A class for presenting a basic animation with little to no special logic"""
+    detailed_frames = {}    # (sheet, offsets, size, detail, flip) -> frames with the detail drawn on
+
     def __init__(self, screen, sprite_sheet, sheet_offsets, pos=(0, 0), resize=None,
                  detail=None, frame_delay=None, flip=False):
         super().__init__()
@@ -17,20 +22,25 @@ class SimpleAnimation(pygame.sprite.Sprite):
             self.image_manager.flip()
         self.image, self.rect = self.image_manager.get_image()
         if detail:
-            self.detail_piece = ImageManager(detail, sheet=True, pos_offsets=sheet_offsets,
-                                             resize=resize).all_images()[0]     # grab first image in detail sheet
-            if flip:
-                self.image_manager.flip()
-            self.image.blit(self.detail_piece, (0, 0))  # combine detail
+            key = (sprite_sheet, tuple(sheet_offsets), tuple(resize), detail, flip)
+            if key not in SimpleAnimation.detailed_frames:
+                detail_piece = ImageManager(detail, sheet=True, pos_offsets=sheet_offsets,
+                                            resize=resize).all_images()[0]     # grab first image in detail sheet
+                frames = [frame.copy() for frame in self.image_manager.all_images()]
+                for frame in frames:
+                    frame.blit(detail_piece, (0, 0))    # combine detail
+                SimpleAnimation.detailed_frames[key] = frames
+            self.detailed_frames = SimpleAnimation.detailed_frames[key]
+            self.image = self.detailed_frames[self.image_manager.frame_position()]
         else:
-            self.detail_piece = None
+            self.detailed_frames = None
         self.rect.centerx, self.rect.centery = pos
 
     def update(self):
         """Update to the next image in the animation"""
         self.image = self.image_manager.next_image()
-        if self.detail_piece:
-            self.image.blit(self.detail_piece, (0, 0))     # combine detail
+        if self.detailed_frames:
+            self.image = self.detailed_frames[self.image_manager.frame_position()]
 
     def blit(self):
         """Blit the current image to the screen"""
@@ -44,7 +54,7 @@ class TitleCard(pygame.sprite.Sprite):
         self.screen = screen
         self.text = text
         self.color = color
-        self.font = pygame.font.Font('fonts/LuckiestGuy-Regular.ttf', size)
+        self.font = TextCache.get_font('fonts/LuckiestGuy-Regular.ttf', size)
         self.image = None
         self.rect = None
         self.pos = pos
@@ -59,7 +69,7 @@ class TitleCard(pygame.sprite.Sprite):
 
     def prep_image(self):
         """Render the text as an image to be displayed"""
-        self.image = self.font.render(self.text, True, self.color)
+        self.image = TextCache.render(self.font, self.text, self.color)
         self.rect = self.image.get_rect()
         self.position()
 
@@ -150,39 +160,55 @@ class ChaseScene:
 
 
 class Intro:
-    """Handles the display and continuation of an introductory cut-scene"""
+    """Handles the display and continuation of an introductory cut-scene.
+    Scenes are built the first time they are needed, or ahead of time one per call to load_next."""
     def __init__(self, screen):
         self.screen = screen
-        self.ghost_intros = [
-            ChaseScene(screen, chasers=['ghost-red.png', 'ghost-pink.png',
-                                        'ghost-lblue.png', 'ghost-orange.png'],
-                       chased=['pacman-horiz.png'], chaser_detail='ghost-eyes.png'),
-            ChaseScene(screen, chasers=['ghost-ppellet.png', 'ghost-ppellet.png',
-                                        'ghost-ppellet.png', 'ghost-ppellet.png'],
-                       chased=['pacman-horiz.png'], reverse=True),
-            GhostIntro(screen, 'ghost-red.png', 'Blinky'),
-            GhostIntro(screen, 'ghost-pink.png', 'Pinky'),
-            GhostIntro(screen, 'ghost-lblue.png', 'Inky'),
-            GhostIntro(screen, 'ghost-orange.png', 'Clyde')
+        self.scene_makers = [
+            partial(ChaseScene, screen, chasers=['ghost-red.png', 'ghost-pink.png',
+                                                 'ghost-lblue.png', 'ghost-orange.png'],
+                    chased=['pacman-horiz.png'], chaser_detail='ghost-eyes.png'),
+            partial(ChaseScene, screen, chasers=['ghost-ppellet.png', 'ghost-ppellet.png',
+                                                 'ghost-ppellet.png', 'ghost-ppellet.png'],
+                    chased=['pacman-horiz.png'], reverse=True),
+            partial(GhostIntro, screen, 'ghost-red.png', 'Blinky'),
+            partial(GhostIntro, screen, 'ghost-pink.png', 'Pinky'),
+            partial(GhostIntro, screen, 'ghost-lblue.png', 'Inky'),
+            partial(GhostIntro, screen, 'ghost-orange.png', 'Clyde')
         ]
+        self.ghost_intros = [None] * len(self.scene_makers)     # scenes, once built
         self.run = set()
         self.intro_index = 0
         self.last_intro_start = None
         self.intro_time = 5000  # time to display in milliseconds
 
+    def get_scene(self, index):
+        """Return a scene of the intro, building it if it hasn't been built yet"""
+        if self.ghost_intros[index] is None:
+            self.ghost_intros[index] = self.scene_makers[index]()
+        return self.ghost_intros[index]
+
+    def load_next(self):
+        """Build the next scene which hasn't been built yet, returning False if all of them have been"""
+        for index, scene in enumerate(self.ghost_intros):
+            if scene is None:
+                self.get_scene(index)
+                return True
+        return False
+
     def update(self):
         """Progress the intro sequence"""
         if not self.last_intro_start:
-            self.last_intro_start = pygame.time.get_ticks()
-        elif abs(self.last_intro_start - pygame.time.get_ticks()) > self.intro_time:
+            self.last_intro_start = GameClock.get_ticks()
+        elif abs(self.last_intro_start - GameClock.get_ticks()) > self.intro_time:
             self.run.add(self.intro_index)
             self.intro_index = (self.intro_index + 1) % len(self.ghost_intros)
-            self.last_intro_start = pygame.time.get_ticks()
+            self.last_intro_start = GameClock.get_ticks()
         if self.intro_index in (0, 1) and self.intro_index in self.run:
-            self.ghost_intros[self.intro_index].reset_positions()
+            self.get_scene(self.intro_index).reset_positions()
             self.run.remove(self.intro_index)
-        self.ghost_intros[self.intro_index].update()
+        self.get_scene(self.intro_index).update()
 
     def blit(self):
         """Blit the intro sequence to the screen"""
-        self.ghost_intros[self.intro_index].blit()
+        self.get_scene(self.intro_index).blit()
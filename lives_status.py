@@ -1,6 +1,6 @@
-import pygame
 from score import ScoreBoard
 from image_manager import ImageManager
+from text_cache import TextCache
 
 
 class ImageRow:
@@ -8,13 +8,13 @@ class ImageRow:
     def __init__(self, screen, img, count, label, pos=(0, 0), color=ScoreBoard.SCORE_WHITE):
         self.screen = screen
         if isinstance(img, str):
-            self.image = pygame.image.load('images/' + img)
+            self.image, _ = ImageManager(img, convert=False, transparency=False).get_image()
         else:
             self.image = img
         self.image_count = None
         self.image_rects = None
         self.color = color
-        self.font = pygame.font.Font('fonts/LuckiestGuy-Regular.ttf', 36)
+        self.font = TextCache.get_font('fonts/LuckiestGuy-Regular.ttf', 36)
         self.text = label
         self.text_image = None
         self.text_image_rect = None
@@ -31,7 +31,7 @@ class ImageRow:
 
     def render_text(self):
         """Render the text as an image to be displayed"""
-        self.text_image = self.font.render(self.text, True, self.color)
+        self.text_image = TextCache.render(self.font, self.text, self.color)
         self.text_image_rect = self.text_image.get_rect()
 
     def update(self, n_count):
@@ -45,10 +45,11 @@ class ImageRow:
         self.position()
 
     def blit(self):
-        """Blit the image row display to the screen"""
-        self.screen.blit(self.text_image, self.text_image_rect)
+        """Blit the image row display to the screen, returning the areas drawn"""
+        drawn = [self.screen.blit(self.text_image, self.text_image_rect)]
         for rect in self.image_rects:
-            self.screen.blit(self.image, rect)
+            drawn.append(self.screen.blit(self.image, rect))
+        return drawn
 
 
 class PacManCounter:
@@ -77,5 +78,5 @@ class PacManCounter:
         self.life_display.update(self.lives)
 
     def blit(self):
-        """Blit the counter display to the screen"""
-        self.life_display.blit()
+        """Blit the counter display to the screen, returning the areas drawn"""
+        return self.life_display.blit()
@@ -1,6 +1,7 @@
 import pygame
 from block import Block
 from fruit import Fruit
+from path_finder import FlowField, PathFinder
 from random import randrange
 
 
@@ -19,17 +20,146 @@ class Teleporter:
                 other.x, other.y = (self.block_1.x + self.block_1.width), self.block_1.y
 
 
+class TileGrid:
+    """Compact per-tile occupancy flags for the maze, used for constant time collision queries"""
+
+    OPEN = 0
+    WALL = 1
+    SHIELD = 2
+    PORTAL = 4
+    DIRECTIONS = {d: (d_col, d_row) for d, (d_row, d_col) in PathFinder.DIRECTIONS.items()}   # (dx, dy) steps
+
+    def __init__(self, x_start, y_start, block_size):
+        self.x_start = x_start
+        self.y_start = y_start
+        self.block_size = block_size
+        self.cells = []     # one bytearray of flags per maze row
+        self.version = 0    # incremented on every change, so copies of the flags know when they are stale
+
+    def reset(self, rows):
+        """Clear the grid to the given row lengths, marking every tile as open"""
+        self.cells = [bytearray(length) for length in rows]
+        self.version += 1
+
+    def load(self, rows):
+        """Overwrite the grid with copies of the given rows of flags"""
+        self.cells = [bytearray(row) for row in rows]
+        self.version += 1
+
+    def get_tile(self, x, y):
+        """Return the (row, col) tile containing the given screen coordinates"""
+        return (y - self.y_start) // self.block_size, (x - self.x_start) // self.block_size
+
+    def get_flags(self, row, col):
+        """Return the flags for a tile, tiles outside the grid are open"""
+        if 0 <= row < len(self.cells) and 0 <= col < len(self.cells[row]):
+            return self.cells[row][col]
+        return TileGrid.OPEN
+
+    def set_flags(self, row, col, flags):
+        """Overwrite the flags stored for a tile"""
+        self.cells[row][col] = flags
+        self.version += 1
+
+    def clear_flags(self, flags):
+        """Remove the given flags from every tile"""
+        for row in self.cells:
+            for col in range(len(row)):
+                row[col] &= ~flags
+        self.version += 1
+
+    def set_flags_at(self, x, y, flags):
+        """Overwrite the flags for the tile containing the given screen coordinates"""
+        self.set_flags(*self.get_tile(x, y), flags)
+
+    def collides(self, rect, mask):
+        """Return True if the rect overlaps any tile with a flag in mask"""
+        top, left = self.get_tile(rect.left, rect.top)
+        bottom, right = self.get_tile(rect.right - 1, rect.bottom - 1)
+        for row in range(max(top, 0), min(bottom + 1, len(self.cells))):
+            line = self.cells[row]
+            for col in range(max(left, 0), min(right + 1, len(line))):
+                flags = line[col] & mask
+                if flags & ~TileGrid.SHIELD:
+                    return True
+                if flags:   # shields only cover the top left quarter of their tile
+                    shield = pygame.Rect(self.x_start + (col * self.block_size),
+                                         self.y_start + (row * self.block_size),
+                                         self.block_size // 2, self.block_size // 2)
+                    if shield.colliderect(rect):
+                        return True
+        return False
+
+    def can_move(self, rect, direction, distance, mask):
+        """Return True if the rect can move the given distance in a direction without hitting a flagged tile"""
+        dx, dy = TileGrid.DIRECTIONS[direction]
+        return not self.collides(rect.move((dx * distance, dy * distance)), mask)
+
+
+class ItemStore:
+    """Tile indexed pellets, power pellets and fruits, for constant time lookups by tile"""
+
+    NONE = 0
+    PELLET = 1
+    POWER_PELLET = 2
+    FRUIT = 3
+
+    def __init__(self):
+        self.kinds = []     # one bytearray of item kinds per maze row
+        self.sprites = {}   # (row, col) -> Block drawn for each live item
+        self.counts = [0, 0, 0, 0]  # live items of each kind
+
+    def reset(self, rows):
+        """Remove every item, sizing the store to the given row lengths"""
+        self.kinds = [bytearray(length) for length in rows]
+        self.sprites.clear()
+        self.counts = [0, 0, 0, 0]
+
+    def get_kind(self, row, col):
+        """Return the kind of item on a tile, tiles outside the store hold nothing"""
+        if 0 <= row < len(self.kinds) and 0 <= col < len(self.kinds[row]):
+            return self.kinds[row][col]
+        return ItemStore.NONE
+
+    def place(self, row, col, kind, sprite):
+        """Put an item on a tile, replacing any item already there"""
+        previous = self.kinds[row][col]
+        if previous != ItemStore.NONE:
+            self.counts[previous] -= 1
+        self.kinds[row][col] = kind
+        self.counts[kind] += 1
+        self.sprites[(row, col)] = sprite
+
+    def take(self, row, col):
+        """Remove the item on a tile, returning its kind and sprite, or None if the tile holds nothing"""
+        kind = self.get_kind(row, col)
+        if kind == ItemStore.NONE:
+            return None
+        self.kinds[row][col] = ItemStore.NONE
+        self.counts[kind] -= 1
+        return kind, self.sprites.pop((row, col))
+
+    def pellets_left(self):
+        """Return the number of pellets and power pellets remaining"""
+        return self.counts[ItemStore.PELLET] + self.counts[ItemStore.POWER_PELLET]
+
+    def blit(self, surface):
+        """Blit every live item onto a surface"""
+        surface.blits([(sprite.image, sprite.rect) for sprite in self.sprites.values()], False)
+
+
 class Maze:
     """Represents the maze displayed to the screen"""
 
     NEON_BLUE = (25, 25, 166)
     WHITE = (255, 255, 255)
     PELLET_YELLOW = (255, 255, 0)
+    BLOCK_SIZE = 20
 
     def __init__(self, screen, maze_map_file):
         self.screen = screen
         self.map_file = maze_map_file
-        self.block_size = 20
+        self.block_size = Maze.BLOCK_SIZE
         self.block_image = pygame.Surface((self.block_size, self.block_size))   # create a block surface
         self.block_image.fill(Maze.NEON_BLUE)
         self.shield_image = pygame.Surface((self.block_size, self.block_size // 2))     # create a shield surface
@@ -40,33 +170,39 @@ class Maze:
         self.ppellet_image = pygame.Surface((self.block_size // 2, self.block_size // 2))  # create a pellet surface
         pygame.draw.circle(self.ppellet_image, Maze.WHITE,  # draw power pellet onto pellet surface
                            (self.block_size // 4, self.block_size // 4), self.block_size // 4)
+        self.fruit_images = Fruit.load_images(self.block_size, self.block_size)   # loaded once, not per rebuild
         with open(self.map_file, 'r') as file:
             self.map_lines = file.readlines()
         self.maze_blocks = pygame.sprite.Group()    # maze assets
         self.shield_blocks = pygame.sprite.Group()
-        self.pellets = pygame.sprite.Group()
-        self.power_pellets = pygame.sprite.Group()
-        self.fruits = pygame.sprite.Group()
+        self.items = ItemStore()    # pellets, power pellets and fruits by tile
+        self.wall_layer = None  # pre-rendered walls and shields, rebuilt only when they change
+        self.background = None  # walls with pellets and fruit, used to erase moving sprites
+        self.dirty_rects = []   # areas of the background changed since they were last collected
         self.teleport = None
+        self.grid = TileGrid(self.screen.get_width() // 5, self.screen.get_height() // 12, self.block_size)
+        self.flow_field = FlowField(self.grid, TileGrid.WALL | TileGrid.PORTAL)     # ghost distances to PacMan
         self.player_spawn = None    # spawn points
         self.ghost_spawn = []
+        self.compiled = False   # templates below are parsed from the map once, then restored from on each build
+        self.wall_tiles = {}    # (row, col) -> wall Block
+        self.shield_template = []
+        self.pellet_template = []   # (tile, pellet Block, fruit position) for each pellet tile
+        self.ppellet_template = []  # (tile, power pellet Block)
+        self.grid_template = []     # tile flags of the unaltered maze
+        self.spawn_template = []
+        self.altered_tiles = set()  # wall tiles changed by portals since the last build
+        self.extra_blocks = {}  # (row, col) -> restored wall Block which is not part of the map
         self.build_maze()   # init maze from file data
 
     def pellets_left(self):
         """Return True if the maze still has pellets, False if not"""
-        return True if self.pellets or self.power_pellets else False
+        return self.items.pellets_left() > 0
 
-    def build_maze(self):
-        """Build the maze layout based on the maze map text file"""
-        # reset maze assets if they exist already
-        if self.maze_blocks or self.pellets or self.fruits or self.power_pellets or self.shield_blocks:
-            self.maze_blocks.empty()
-            self.pellets.empty()
-            self.power_pellets.empty()
-            self.fruits.empty()
-            self.shield_blocks.empty()
-        if len(self.ghost_spawn) > 0:
-            self.ghost_spawn.clear()
+    def compile_maze(self):
+        """Parse the maze map text file into the templates used to build the maze"""
+        self.grid.reset(len(line.rstrip('\n')) for line in self.map_lines)
+        self.items.reset(len(line.rstrip('\n')) for line in self.map_lines)
         teleport_points = []
         y_start = self.screen.get_height() // 12
         y = 0
@@ -77,36 +213,37 @@ class Maze:
             for j in range(len(line)):
                 co = line[j]
                 if co == 'x':
-                    self.maze_blocks.add(Block(x_start + (x * self.block_size),
-                                               y_start + (y * self.block_size),
-                                               self.block_size, self.block_size,
-                                               self.block_image))
+                    self.wall_tiles[(i, j)] = Block(x_start + (x * self.block_size),
+                                                    y_start + (y * self.block_size),
+                                                    self.block_size, self.block_size,
+                                                    self.block_image)
+                    self.grid.set_flags(i, j, TileGrid.WALL)
                 elif co == '*':
-                    if randrange(0, 100) > 1:
-                        self.pellets.add(Block(x_start + (self.block_size // 3) + (x * self.block_size),
-                                               y_start + (self.block_size // 3) + (y * self.block_size),
-                                               self.block_size, self.block_size,
-                                               self.pellet_image))
-                    else:
-                        self.fruits.add(Fruit(x_start + (self.block_size // 4) + (x * self.block_size),
-                                              y_start + (self.block_size // 4) + (y * self.block_size),
-                                              self.block_size, self.block_size))
+                    self.pellet_template.append(((i, j),
+                                                 Block(x_start + (self.block_size // 3) + (x * self.block_size),
+                                                       y_start + (self.block_size // 3) + (y * self.block_size),
+                                                       self.block_size, self.block_size,
+                                                       self.pellet_image),
+                                                 (x_start + (self.block_size // 4) + (x * self.block_size),
+                                                  y_start + (self.block_size // 4) + (y * self.block_size))))
                 elif co == '@':
-                    self.power_pellets.add(Block(x_start + (self.block_size // 3) + (x * self.block_size),
-                                                 y_start + (self.block_size // 3) + (y * self.block_size),
-                                                 self.block_size, self.block_size,
-                                                 self.ppellet_image))
+                    self.ppellet_template.append(((i, j),
+                                                  Block(x_start + (self.block_size // 3) + (x * self.block_size),
+                                                        y_start + (self.block_size // 3) + (y * self.block_size),
+                                                        self.block_size, self.block_size,
+                                                        self.ppellet_image)))
                 elif co == 's':
-                    self.shield_blocks.add(Block(x_start + (x * self.block_size),
-                                                 y_start + (y * self.block_size),
-                                                 self.block_size // 2, self.block_size // 2,
-                                                 self.shield_image))
+                    self.shield_template.append(Block(x_start + (x * self.block_size),
+                                                      y_start + (y * self.block_size),
+                                                      self.block_size // 2, self.block_size // 2,
+                                                      self.shield_image))
+                    self.grid.set_flags(i, j, TileGrid.SHIELD)
                 elif co == 'o':
                     self.player_spawn = [(i, j), (x_start + (x * self.block_size) + (self.block_size // 2),
                                          y_start + (y * self.block_size) + (self.block_size // 2))]
                 elif co == 'g':
-                    self.ghost_spawn.append(((i, j), (x_start + (x * self.block_size),
-                                            y_start + (y * self.block_size))))
+                    self.spawn_template.append(((i, j), (x_start + (x * self.block_size),
+                                                y_start + (y * self.block_size))))
                 elif co == 't':
                     teleport_points.append(pygame.Rect(x_start + (x * self.block_size),
                                                        y_start + (y * self.block_size),
@@ -115,15 +252,122 @@ class Maze:
             y += 1
         if len(teleport_points) == 2:
             self.teleport = Teleporter(teleport_points[0], teleport_points[1])
+        self.grid_template = [bytes(row) for row in self.grid.cells]
+        self.maze_blocks.add(*self.wall_tiles.values())
+        self.compiled = True
+
+    def build_maze(self):
+        """Build the maze layout based on the maze map text file, restoring only what changed since the last build"""
+        if not self.compiled:
+            self.compile_maze()
+        if self.altered_tiles:  # revert walls changed by portals
+            for tile in self.altered_tiles:
+                extra = self.extra_blocks.pop(tile, None)
+                if extra:
+                    extra.kill()
+                if tile in self.wall_tiles:
+                    self.maze_blocks.add(self.wall_tiles[tile])
+            self.altered_tiles.clear()
+            self.wall_layer = None
+        if len(self.shield_blocks) != len(self.shield_template):
+            self.shield_blocks.add(*self.shield_template)
+            self.wall_layer = None
+        self.grid.load(self.grid_template)
+        self.ghost_spawn[:] = self.spawn_template
+        kinds = self.items.kinds
+        for (i, j), pellet, fruit_pos in self.pellet_template:  # fruit placement is rolled again on every build
+            if randrange(0, 100) > 1:
+                if kinds[i][j] != ItemStore.PELLET:
+                    self.items.place(i, j, ItemStore.PELLET, pellet)
+            else:
+                self.items.place(i, j, ItemStore.FRUIT,
+                                 Fruit(*fruit_pos, self.block_size, self.block_size, self.fruit_images))
+        for (i, j), ppellet in self.ppellet_template:
+            if kinds[i][j] != ItemStore.POWER_PELLET:
+                self.items.place(i, j, ItemStore.POWER_PELLET, ppellet)
+        self.background = None
 
     def remove_shields(self):
         """Remove any shields from the maze"""
         self.shield_blocks.empty()
+        self.grid.clear_flags(TileGrid.SHIELD)
+        self.wall_layer = None
+        self.background = None
+
+    def remove_block(self, block):
+        """Remove a wall block from the maze, leaving its tile open"""
+        block.kill()
+        tile = self.grid.get_tile(block.rect.x, block.rect.y)
+        self.grid.set_flags(*tile, TileGrid.OPEN)
+        self.altered_tiles.add(tile)
+        self.wall_layer = None
+        self.background = None
+
+    def restore_block(self, x, y):
+        """Place a wall block back into the maze at the given screen position"""
+        tile = self.grid.get_tile(x, y)
+        block = self.wall_tiles.get(tile)
+        if block is None or block.alive():  # not a wall of the map, so make a new one
+            block = self.extra_blocks.setdefault(tile, Block(x, y, self.block_size, self.block_size,
+                                                             self.block_image))
+        self.maze_blocks.add(block)
+        self.grid.set_flags(*tile, TileGrid.WALL)
+        self.altered_tiles.add(tile)
+        self.wall_layer = None
+        self.background = None
+
+    def get_block(self, row, col):
+        """Return the wall block standing on a tile, or None if there is none"""
+        for block in (self.extra_blocks.get((row, col)), self.wall_tiles.get((row, col))):
+            if block is not None and block.alive():
+                return block
+        return None
+
+    def remove_item(self, row, col):
+        """Remove the pellet or fruit on a tile, returning its kind, or None if the tile holds nothing"""
+        taken = self.items.take(row, col)
+        if taken is None:
+            return None
+        kind, item = taken
+        if self.background is not None:     # patch the item out of the background
+            area = pygame.Rect(item.rect.topleft, item.image.get_size())
+            self.background.blit(self.wall_layer, area, area)
+            self.dirty_rects.append(area)
+        return kind
+
+    def build_wall_layer(self):
+        """Render all walls and shields onto a single screen sized surface"""
+        self.wall_layer = pygame.Surface(self.screen.get_size(), 0, self.screen)
+        self.wall_layer.fill((0, 0, 0))
+        self.maze_blocks.draw(self.wall_layer)
+        self.shield_blocks.draw(self.wall_layer)
+
+    def build_background(self):
+        """Render walls, shields, pellets and fruit onto a single screen sized surface"""
+        if self.wall_layer is None:
+            self.build_wall_layer()
+        self.background = self.wall_layer.copy()
+        self.items.blit(self.background)
+        self.dirty_rects.clear()
+
+    def blit_background(self, area=None):
+        """Blit the maze background to the screen, either in full or only within the given area"""
+        if self.background is None:
+            self.build_background()
+        if area is None:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            self.screen.blit(self.background, area, area)
+
+    def collect_dirty_rects(self):
+        """Return and forget the areas of the background changed since the last call"""
+        rects = self.dirty_rects
+        self.dirty_rects = []
+        return rects
 
     def blit(self):
         """Blit all maze blocks to the screen"""
-        self.maze_blocks.draw(self.screen)
-        self.pellets.draw(self.screen)
-        self.power_pellets.draw(self.screen)
-        self.fruits.draw(self.screen)
-        self.shield_blocks.draw(self.screen)
+        if self.wall_layer is None:
+            self.build_wall_layer()
+        self.screen.blit(self.wall_layer, (0, 0))   # covers the whole screen, so no fill is needed
+        self.items.blit(self.screen)
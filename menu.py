@@ -1,6 +1,7 @@
 import pygame
 from pacman import PacMan
 from intro import TitleCard
+from text_cache import TextCache
 
 
 class Button:
@@ -12,12 +13,13 @@ class Button:
         # Dimensions and properties of the button
         self.text_color = text_color
         self.alt_color = alt_color
-        self.font = pygame.font.Font('fonts/LuckiestGuy-Regular.ttf', size)
+        self.font = TextCache.get_font('fonts/LuckiestGuy-Regular.ttf', size)
         self.pos = pos
 
         # Prep button message
         self.msg = msg
         self.msg_image, self.msg_image_rect = None, None
+        self.msg_color = None
         self.prep_msg(self.text_color)
 
     def check_button(self, mouse_x, mouse_y):
@@ -36,7 +38,10 @@ class Button:
 
     def prep_msg(self, color):
         """Turn msg into a rendered image and center it on the button"""
-        self.msg_image = self.font.render(self.msg, True, color)
+        if color == self.msg_color:
+            return  # already rendered in this color
+        self.msg_color = color
+        self.msg_image = TextCache.render(self.font, self.msg, color)
         self.msg_image_rect = self.msg_image.get_rect()
         self.msg_image_rect.centerx, self.msg_image_rect.centery = self.pos
 
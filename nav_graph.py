@@ -0,0 +1,38 @@
+from path_finder import PathFinder
+
+
+class NavGraph:
+    """The junctions and legal exits of a maze map, compiled once per map for ghost decisions"""
+    loaded = {}     # navigation graphs shared between all users of the same maze map
+
+    def __init__(self, maze_map):
+        self.finder = PathFinder.for_map(maze_map)
+        self.exits = {}     # open tile -> directions leading to open tiles
+        self.junctions = set()  # tiles where ghosts pick a new direction
+        self.build_exits()
+        self.build_junctions()
+
+    @classmethod
+    def for_map(cls, maze_map):
+        """Return the shared navigation graph for a maze map, creating it on first use"""
+        key = tuple(maze_map)
+        if key not in cls.loaded:
+            cls.loaded[key] = cls(maze_map)
+        return cls.loaded[key]
+
+    def build_exits(self):
+        """Find the open directions out of every open tile"""
+        maze_map = self.finder.maze_map
+        for row in range(len(maze_map)):
+            for col in range(len(maze_map[row])):
+                if self.finder.is_open((row, col)):
+                    self.exits[(row, col)] = tuple(d for d in PathFinder.DIRECTIONS
+                                                   if self.finder.is_open(PathFinder.step((row, col), d)))
+
+    def build_junctions(self):
+        """Find the open tiles with more than two exits"""
+        self.junctions = {tile for tile, exits in self.exits.items() if len(exits) > 2}
+
+    def is_junction(self, tile):
+        """Return True if the tile is a junction"""
+        return tile in self.junctions
@@ -2,6 +2,7 @@ import pygame
 from image_manager import ImageManager
 from sound_manager import SoundManager
 from portal import PortalController
+from maze import TileGrid, ItemStore
 
 
 class PacMan(pygame.sprite.Sprite):
@@ -86,6 +87,7 @@ class PacMan(pygame.sprite.Sprite):
     def reset_position(self):
         """Reset position back to pre-define spawn location"""
         self.rect.centerx, self.rect.centery = self.spawn_info  # screen coordinates for spawn
+        self.tile = self.maze.player_spawn[0]
 
     def reset_direction(self, event):
         """Reset the movement direction if key-up on movement keys"""
@@ -149,25 +151,10 @@ class PacMan(pygame.sprite.Sprite):
         """Check if PacMan is blocked by any maze barriers, return True if blocked, False if clear"""
         result = False
         if self.direction is not None and self.moving:
-            original_pos = self.rect
-            if self.direction == 'u':
-                test = self.rect.move((0, -self.speed))
-            elif self.direction == 'l':
-                test = self.rect.move((-self.speed, 0))
-            elif self.direction == 'd':
-                test = self.rect.move((0, self.speed))
-            else:
-                test = self.rect.move((self.speed, 0))
-            self.rect = test    # temporarily move self
-
-            # if any collision, result = True
-            if pygame.sprite.spritecollideany(self, self.maze.maze_blocks):
-                result = True
-            elif pygame.sprite.spritecollideany(self, self.maze.shield_blocks):
-                result = True
-            elif not self.portal_controller.portables_usable():
-                result = self.portal_controller.collide_portals(self)
-            self.rect = original_pos    # reset position
+            barriers = TileGrid.WALL | TileGrid.SHIELD
+            if not self.portal_controller.portables_usable():
+                barriers |= TileGrid.PORTAL     # portals act as walls until both exist
+            result = not self.maze.grid.can_move(self.rect, self.direction, self.speed, barriers)
         return result
 
     def update(self):
@@ -194,29 +181,25 @@ class PacMan(pygame.sprite.Sprite):
             self.image = self.death_images.next_image()
 
     def blit(self):
-        """Blit the PacMan sprite to the screen"""
-        self.portal_controller.blit()
-        self.screen.blit(self.image, self.rect)
+        """Blit the PacMan sprite to the screen, returning the areas drawn"""
+        drawn = self.portal_controller.blit()
+        drawn.append(self.screen.blit(self.image, self.rect))
+        return drawn
 
     def eat(self):
         """Eat pellets from the maze and return the score accumulated"""
         score = 0
         fruit_count = 0
         power = None
-        collision = pygame.sprite.spritecollideany(self, self.maze.pellets)
-        if collision:
-            collision.kill()
+        kind = self.maze.remove_item(*self.maze.grid.get_tile(*self.rect.center))     # item on PacMan's tile
+        if kind == ItemStore.PELLET:
             score += 10
             self.sound_manager.play('eat')
-        collision = pygame.sprite.spritecollideany(self, self.maze.fruits)
-        if collision:
-            collision.kill()
+        elif kind == ItemStore.FRUIT:
             score += 20
             fruit_count += 1
             self.sound_manager.play('fruit')
-        collision = pygame.sprite.spritecollideany(self, self.maze.power_pellets)
-        if collision:
-            collision.kill()
+        elif kind == ItemStore.POWER_PELLET:
             score += 20
             power = True
             self.sound_manager.play('eat')
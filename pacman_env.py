@@ -0,0 +1,186 @@
+import os
+from multiprocessing import Pipe, Process
+import numpy as np
+import pygame
+from game_clock import GameClock
+from pacman_game import PacManPortalGame
+
+
+class PacManEnv:
+    """A reset/step environment around a headless game, for training agents.
+    Observations are read from the game state (maze grid, items and entity positions), never from screen pixels."""
+
+    ACTIONS = [pygame.K_UP, pygame.K_LEFT, pygame.K_DOWN, pygame.K_RIGHT,   # keys of PacMan.action_map used as
+               pygame.K_q, pygame.K_w]                                      # actions: moves, then portal shots
+    DIRECTIONS = (None, 'u', 'l', 'd', 'r')     # direction codes in observations
+    MAX_SKIP = 100000   # most steps simulated while skipping a single transition
+
+    def __init__(self, seed=None, maze_file='maze_map.txt', frame_skip=1, skip_transitions=True, ghost_engine=False):
+        self.seed = seed
+        self.maze_file = maze_file
+        self.frame_skip = frame_skip    # game steps each action is repeated for
+        self.skip_transitions = skip_transitions    # simulate level transitions without asking for actions
+        self.ghost_engine = ghost_engine
+        self.game = None
+        self.e_loop = None
+        self.episode = 0
+        self.score = 0  # kept from before a game over resets the score keeper
+
+    def reset(self, seed=None):
+        """Start a new game, returning the first observation.
+        Each episode after the first with a fixed seed uses the next seed, so episodes differ but stay repeatable."""
+        if seed is not None:
+            self.seed, self.episode = seed, 0
+        episode_seed = None if self.seed is None else self.seed + self.episode
+        self.episode += 1
+        self.game = PacManPortalGame(headless=True, seed=episode_seed, maze_file=self.maze_file,
+                                     ghost_engine=self.ghost_engine)
+        pygame.event.clear()    # drop timer events left over from the previous game
+        self.e_loop = self.game.start_game()
+        self.score = 0
+        self.skip_transition()
+        return self.observe()
+
+    def step(self, action):
+        """Apply an action (an index into ACTIONS, or None for no new input) and advance the game.
+        Returns (observation, reward, done, info), where the reward is the score gained."""
+        score = self.score
+        if action is not None:
+            self.game.player.action_map[PacManEnv.ACTIONS[action]]()
+        for _ in range(self.frame_skip):
+            self.advance()
+            if not self.e_loop.loop_running:
+                break
+        self.skip_transition()
+        done = not self.e_loop.loop_running
+        return self.observe(), self.score - score, done, self.info()
+
+    def advance(self):
+        """Simulate a single game step"""
+        GameClock.advance(self.game.step_time)
+        self.e_loop.check_events()
+        self.game.update_game()
+        self.score = self.game.score_keeper.score
+        self.game.check_game_over(self.e_loop)
+
+    def skip_transition(self):
+        """Simulate through a level transition, if one is showing and transitions are skipped"""
+        steps = 0
+        while self.skip_transitions and self.game.level_transition.transition_show and self.e_loop.loop_running \
+                and steps < PacManEnv.MAX_SKIP:
+            self.advance()
+            steps += 1
+
+    def info(self):
+        """Return game statistics which are not part of the observation"""
+        return {'score': self.score, 'level': self.game.score_keeper.level,
+                'lives': self.game.life_counter.lives, 'game_over': self.game.game_over}
+
+    def observe(self):
+        """Return the current game state as a dict of NumPy arrays"""
+        maze = self.game.maze
+        player = self.game.player
+        controller = player.portal_controller
+        return {
+            'grid': PacManEnv.to_array(maze.grid.cells),     # TileGrid flags: walls, shields, portals
+            'items': PacManEnv.to_array(maze.items.kinds),   # ItemStore kinds: pellets, power pellets, fruit
+            # row, column, x, y, direction, moving, dead
+            'player': np.array(self.entity(player) + [player.moving, player.dead], dtype=np.int32),
+            # row, column, x, y, direction, enabled, blue, returning to spawn
+            'ghosts': np.array([self.entity(g) + [g.state['enabled'], g.state['blue'], g.state['return']]
+                                for g in self.game.ghosts], dtype=np.int32),
+            # open, row, column for the blue then orange portal
+            'portals': np.array([[1, *maze.grid.get_tile(portal.sprite.rect.x, portal.sprite.rect.y)] if portal
+                                 else [0, 0, 0] for portal in (controller.blue_portal, controller.orange_portal)],
+                                dtype=np.int32),
+            'stats': np.array([self.game.score_keeper.score, self.game.life_counter.lives,
+                               self.game.score_keeper.level], dtype=np.int32),
+        }
+
+    @staticmethod
+    def to_array(rows):
+        """Copy rows of bytes into a 2D array, padding short rows with zeros"""
+        width = max(len(row) for row in rows)
+        data = b''.join(bytes(row).ljust(width, b'\0') for row in rows)
+        return np.frombuffer(data, dtype=np.uint8).reshape(len(rows), width).copy()
+
+    def entity(self, sprite):
+        """Return the tile, center position and direction code of a player or ghost sprite"""
+        row, col = self.game.maze.grid.get_tile(sprite.rect.centerx, sprite.rect.centery)
+        return [row, col, sprite.rect.centerx, sprite.rect.centery, PacManEnv.DIRECTIONS.index(sprite.direction)]
+
+    def close(self):
+        """Release the game"""
+        self.game = None
+        self.e_loop = None
+
+
+def env_worker(connection, env_kwargs):
+    """Serve reset and step commands for one environment in its own process"""
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    env = PacManEnv(**env_kwargs)
+    while True:
+        command, data = connection.recv()
+        if command == 'reset':
+            connection.send(env.reset(data))
+        elif command == 'step':
+            obs, reward, done, info = env.step(data)
+            if done:    # start the next episode right away, keeping the final observation in the info
+                info['final_observation'] = obs
+                obs = env.reset()
+            connection.send((obs, reward, done, info))
+        elif command == 'close':
+            env.close()
+            connection.close()
+            pygame.quit()
+            break
+
+
+class PacManVecEnv:
+    """Steps many PacManEnvs per call, each in its own process (the game clock and pygame event queue are per
+    process). Observations are stacked along a new first axis; finished episodes are reset automatically."""
+
+    def __init__(self, num_envs, seed=0, **env_kwargs):
+        self.num_envs = num_envs
+        self.connections = []
+        self.processes = []
+        for i in range(num_envs):
+            parent, child = Pipe()
+            process = Process(target=env_worker, args=(child, {'seed': seed + (i * 1000000), **env_kwargs}))
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    @staticmethod
+    def stack(observations):
+        """Stack a list of observation dicts into one dict of arrays"""
+        return {key: np.stack([obs[key] for obs in observations]) for key in observations[0]}
+
+    def reset(self):
+        """Reset every environment, returning their stacked observations"""
+        for connection in self.connections:
+            connection.send(('reset', None))
+        return PacManVecEnv.stack([connection.recv() for connection in self.connections])
+
+    def step(self, actions):
+        """Step every environment with its action, returning stacked observations, rewards, dones and infos"""
+        for connection, action in zip(self.connections, actions):
+            connection.send(('step', action))
+        results = [connection.recv() for connection in self.connections]
+        observations, rewards, dones, infos = zip(*results)
+        return PacManVecEnv.stack(observations), np.array(rewards), np.array(dones), list(infos)
+
+    def close(self):
+        """Stop every environment's process"""
+        for connection in self.connections:
+            connection.send(('close', None))
+        for process in self.processes:
+            process.join()  # not terminated, pygame turns SIGTERM into a QUIT event
+        self.connections, self.processes = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,13 +1,24 @@
+import argparse
+import os
+import random
 import pygame
+from time import perf_counter
 from event_loop import EventLoop
 from ghost import Ghost
+from ghost_engine import GhostEngine
 from maze import Maze
 from pacman import PacMan
 from lives_status import PacManCounter
 from score import ScoreController, LevelTransition
-from sound_manager import SoundManager
+from sound_manager import SoundManager, SoundBank
 from menu import Menu, HighScoreScreen
 from intro import Intro
+from game_clock import GameClock
+from dirty_renderer import DirtyRenderer
+from frame_timer import FrameTimer, StartupTimer
+from image_manager import ImageManager
+from texture_atlas import TextureAtlas
+from input_log import InputLog
 
 
 class PacManPortalGame:
@@ -18,55 +29,133 @@ class PacManPortalGame:
     START_EVENT = pygame.USEREVENT + 1
     REBUILD_EVENT = pygame.USEREVENT + 2
     LEVEL_TRANSITION_EVENT = pygame.USEREVENT + 3
+    STEP_TIME = 1000 / 60   # milliseconds of game time per simulation step
+    MAX_FRAME_TIME = 250    # most real milliseconds simulated per rendered frame, so slow frames can't snowball
 
-    def __init__(self):
+    def __init__(self, headless=False, dirty_rendering=False, seed=None, record_log=None, replay_log=None,
+                 ghost_engine=False, maze_file='maze_map.txt', defer_loading=False):
+        self.startup_timer = StartupTimer()     # printed with PACMAN_STARTUP_REPORT=1
+        self.headless = headless
+        self.record_log = record_log
+        self.replay_log = replay_log
+        self.step_time = PacManPortalGame.STEP_TIME
+        if replay_log:
+            seed = replay_log.seed
+            self.step_time = replay_log.step_time
+        if seed is not None:
+            random.seed(seed)   # fruit placement in the maze
+        if headless:    # no window or audio device
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        GameClock.reset()   # game time only moves when the game loops advance it
         pygame.init()
-        pygame.mixer.music.load('sounds/bg-music.wav')
+        if headless:
+            pygame.mixer.quit()
+        else:
+            SoundBank.preload()     # decoded in the background while the intro and menu are set up and shown
         self.screen = pygame.display.set_mode(
             (800, 600)
         )
         pygame.display.set_caption('PacMan Portal')
         self.clock = pygame.time.Clock()
+        TextureAtlas.load(Maze.BLOCK_SIZE)  # every cached frame in one read, if the atlas has been built
         self.score_keeper = ScoreController(screen=self.screen,
                                             sb_pos=((self.screen.get_width() // 5),
                                                     (self.screen.get_height() * 0.965)),
                                             items_image='cherry.png',
                                             itc_pos=(int(self.screen.get_width() * 0.6),
                                                      self.screen.get_height() * 0.965))
-        self.maze = Maze(screen=self.screen, maze_map_file='maze_map.txt')
-        self.life_counter = PacManCounter(screen=self.screen, ct_pos=((self.screen.get_width() // 3),
-                                                                      (self.screen.get_height() * 0.965)),
-                                          images_size=(self.maze.block_size, self.maze.block_size))
-        self.level_transition = LevelTransition(screen=self.screen, score_controller=self.score_keeper)
+        self.startup_timer.mark('display')
+        self.maze_file = maze_file
+        self.dirty_rendering = dirty_rendering
+        self.use_ghost_engine = ghost_engine
+        self.maze = None    # gameplay parts below are built by load_stages
+        self.renderer = None
+        self.life_counter = None
+        self.level_transition = None
         self.game_over = True
         self.pause = False
-        self.player = PacMan(screen=self.screen, maze=self.maze)
+        self.player = None
         self.ghosts = pygame.sprite.Group()
-        self.ghost_sound_manager = SoundManager(sound_files=['ghost-blue.wav', 'ghost-eaten.wav', 'ghost-std.wav'],
-                                                keys=['blue', 'eaten', 'std'],
-                                                channel=Ghost.GHOST_AUDIO_CHANNEL)
+        self.ghost_sound_manager = None
         self.ghost_active_interval = 2500
         self.ghosts_to_activate = None
         self.first_ghost = None
         self.other_ghosts = []
-        self.spawn_ghosts()
-        self.actions = {PacManPortalGame.START_EVENT: self.init_ghosts,
+        self.ghost_engine = None
+        self.frame_timer = FrameTimer(self.screen)  # per-phase timing overlay, toggled with F3
+        self.actions = {pygame.KEYDOWN: self.check_key,
+                        PacManPortalGame.START_EVENT: self.init_ghosts,
                         PacManPortalGame.REBUILD_EVENT: self.rebuild_maze,
                         PacManPortalGame.LEVEL_TRANSITION_EVENT: self.next_level}
+        self.loader = self.load_stages()    # None once everything is loaded
+        if defer_loading:
+            if not TextureAtlas.loaded:
+                ImageManager.preload()  # image files are read on a worker thread until the stages need them
+        else:
+            self.finish_loading()
+            self.startup_timer.report()
+
+    def load_stages(self):
+        """Build the gameplay parts of the game, pausing after each stage"""
+        self.maze = Maze(screen=self.screen, maze_map_file=self.maze_file)
+        self.renderer = DirtyRenderer(self.maze) if self.dirty_rendering else None
+        self.startup_timer.mark('maze')
+        yield
+        self.life_counter = PacManCounter(screen=self.screen, ct_pos=((self.screen.get_width() // 3),
+                                                                      (self.screen.get_height() * 0.965)),
+                                          images_size=(self.maze.block_size, self.maze.block_size))
+        self.level_transition = LevelTransition(screen=self.screen, score_controller=self.score_keeper)
+        self.startup_timer.mark('hud')
+        yield
+        self.player = PacMan(screen=self.screen, maze=self.maze)
+        self.startup_timer.mark('player')
+        yield
+        self.ghost_sound_manager = SoundManager(sound_files=['ghost-blue.wav', 'ghost-eaten.wav', 'ghost-std.wav'],
+                                                keys=['blue', 'eaten', 'std'],
+                                                channel=Ghost.GHOST_AUDIO_CHANNEL)
+        self.spawn_ghosts()
+        # batched ghost movement, if requested and NumPy is available
+        if self.use_ghost_engine and GhostEngine.available():
+            self.ghost_engine = GhostEngine(self.maze, self.ghosts)
+        self.startup_timer.mark('ghosts')
+
+    def load_next(self):
+        """Run the next loading stage, returning False once everything is loaded"""
+        if self.loader is None:
+            return False
+        self.startup_timer.begin()
+        try:
+            next(self.loader)
+        except StopIteration:
+            self.loader = None
+        return self.loader is not None
+
+    def finish_loading(self):
+        """Run any loading stages left"""
+        while self.load_next():
+            pass
+
+    def check_key(self, event):
+        """Toggle the frame timer on F3, passing every other key press to the player"""
+        if event.key == pygame.K_F3:
+            self.frame_timer.toggle()
+        else:
+            self.player.perform_action(event)
 
     def init_ghosts(self):
         """kick start the ghost AI over a period of time"""
         if not self.first_ghost.state['enabled']:
             self.first_ghost.enable()
             self.ghosts_to_activate = self.other_ghosts.copy()
-            pygame.time.set_timer(PacManPortalGame.START_EVENT, 0)  # disable timer repeat
-            pygame.time.set_timer(PacManPortalGame.START_EVENT, self.ghost_active_interval)
+            GameClock.set_timer(PacManPortalGame.START_EVENT, 0)  # disable timer repeat
+            GameClock.set_timer(PacManPortalGame.START_EVENT, self.ghost_active_interval)
         else:
             try:
                 g = self.ghosts_to_activate.pop()
                 g.enable()
             except IndexError:
-                pygame.time.set_timer(PacManPortalGame.START_EVENT, 0)  # disable timer repeat
+                GameClock.set_timer(PacManPortalGame.START_EVENT, 0)  # disable timer repeat
 
     def spawn_ghosts(self):
         """Create all ghosts at their starting positions"""
@@ -85,7 +174,7 @@ class PacManPortalGame:
 
     def next_level(self):
         """Increment the game level and then continue the game"""
-        pygame.time.set_timer(PacManPortalGame.LEVEL_TRANSITION_EVENT, 0)  # reset timer
+        GameClock.set_timer(PacManPortalGame.LEVEL_TRANSITION_EVENT, 0)  # reset timer
         self.player.clear_portals()
         self.score_keeper.increment_level()
         self.rebuild_maze()
@@ -107,7 +196,7 @@ class PacManPortalGame:
             self.level_transition.set_show_transition()
         else:
             self.game_over = True
-        pygame.time.set_timer(PacManPortalGame.REBUILD_EVENT, 0)    # disable timer repeat
+        GameClock.set_timer(PacManPortalGame.REBUILD_EVENT, 0)    # disable timer repeat
 
     def check_player(self):
         """Check the player to see if they have been hit by an enemy, or if they have consumed pellets/fruit"""
@@ -127,21 +216,25 @@ class PacManPortalGame:
             for g in self.ghosts:
                 if g.state['enabled']:   # disable any ghosts
                     g.disable()
-            pygame.time.set_timer(PacManPortalGame.START_EVENT, 0)  # cancel start event
-            pygame.time.set_timer(PacManPortalGame.REBUILD_EVENT, 4000)
+            GameClock.set_timer(PacManPortalGame.START_EVENT, 0)  # cancel start event
+            GameClock.set_timer(PacManPortalGame.REBUILD_EVENT, 4000)
         elif not self.maze.pellets_left() and not self.pause:
-            pygame.mixer.stop()
+            if pygame.mixer.get_init():
+                pygame.mixer.stop()
             self.pause = True
-            pygame.time.set_timer(PacManPortalGame.LEVEL_TRANSITION_EVENT, 1000)
+            GameClock.set_timer(PacManPortalGame.LEVEL_TRANSITION_EVENT, 1000)
 
-    def update_screen(self):
-        """Update the game screen"""
+    def update_game(self):
+        """Advance the game logic by a single step, without drawing"""
         if not self.level_transition.transition_show:
-            self.screen.fill(PacManPortalGame.BLACK_BG)
             self.check_player()
-            self.maze.blit()
+            self.frame_timer.mark('check_player')
             if not self.pause:
-                self.ghosts.update()
+                if self.ghost_engine:
+                    self.ghost_engine.update(self.player)
+                else:
+                    self.ghosts.update()
+                self.frame_timer.mark('ghosts')
                 self.player.update()
                 self.maze.teleport.check_teleport(self.player.rect)     # teleport player/projectiles
             for g in self.ghosts:
@@ -149,29 +242,67 @@ class PacManPortalGame:
                     if not g.state['speed_boost']:
                         g.increase_speed()
                     self.maze.teleport.check_teleport(g.rect)   # teleport ghosts
-                g.blit()
-            self.player.blit()
-            self.score_keeper.blit()
-            self.life_counter.blit()
+            self.frame_timer.mark('player')
         elif self.player.dead:
             self.player.update()
-            self.player.blit()
         else:
-            self.level_transition.draw()
+            self.level_transition.update()
             # if transition just finished, init ghosts
             if not self.level_transition.transition_show:
                 self.init_ghosts()
-        pygame.display.flip()
+
+    def draw_sprites(self):
+        """Draw all moving game parts and the HUD over the maze, returning the areas drawn"""
+        self.frame_timer.mark('maze')   # the maze is drawn (or erased) just before the sprites
+        drawn = [g.blit() for g in self.ghosts]
+        drawn += self.player.blit()
+        self.frame_timer.mark('sprites')
+        drawn += self.score_keeper.blit()
+        drawn += self.life_counter.blit()
+        self.frame_timer.mark('hud')
+        drawn += self.frame_timer.blit()
+        return drawn
+
+    def draw_screen(self):
+        """Draw the current game state to the screen"""
+        if not self.level_transition.transition_show:
+            self.maze.blit()    # maze layer covers the whole screen
+            self.draw_sprites()
+        elif self.player.dead:
+            self.player.blit()
+        else:
+            self.level_transition.draw()
+
+    def render_screen(self):
+        """Draw the current game state and update the display"""
+        if self.renderer and not self.level_transition.transition_show:
+            self.renderer.render(self.draw_sprites)
+        else:   # transitions redraw the whole screen
+            self.draw_screen()
+            pygame.display.flip()
+            if self.renderer:
+                self.renderer.request_full_redraw()
+        self.frame_timer.mark('flip')
+
+    def update_screen(self):
+        """Update the game screen"""
+        self.update_game()
+        self.render_screen()
 
     def run(self):
-        """Run the game application, starting from the menu"""
+        """Run the game application, starting from the menu.
+        The first menu frame is shown right away, then the intro scenes and the gameplay parts not loaded yet are
+        built one per frame (or all at once, if play starts first)."""
         menu = Menu(self.screen)
-        hs_screen = HighScoreScreen(self.screen, self.score_keeper)
+        hs_screen = None    # built the first time it is shown
         intro_seq = Intro(self.screen)
         e_loop = EventLoop(loop_running=True, actions={pygame.MOUSEBUTTONDOWN: menu.check_buttons})
+        pygame.mixer.music.load('sounds/bg-music.wav')  # streamed, so only opened here
+        self.startup_timer.mark('menu')
+        first_frame = True
 
         while e_loop.loop_running:
-            self.clock.tick(60)  # 60 fps limit
+            GameClock.advance(self.clock.tick(60))  # 60 fps limit, menu time follows real time
             e_loop.check_events()
             self.screen.fill(PacManPortalGame.BLACK_BG)
             if not menu.hs_screen:
@@ -180,6 +311,8 @@ class PacManPortalGame:
                 menu.update()
                 menu.blit()
             else:
+                if not hs_screen:
+                    hs_screen = HighScoreScreen(self.screen, self.score_keeper)
                 hs_screen.blit()    # display highs score screen
                 hs_screen.check_done()
             if menu.ready_to_play:
@@ -189,17 +322,32 @@ class PacManPortalGame:
                     g.reset_speed()
                 menu.ready_to_play = False
                 self.score_keeper.save_high_scores()    # save high scores only on complete play
-                hs_screen.prep_images()     # update high scores page
-                hs_screen.position()
+                TextureAtlas.refresh(Maze.BLOCK_SIZE)   # add frames first prepared during play (e.g. portals)
+                if hs_screen:
+                    hs_screen.prep_images()     # update high scores page
+                    hs_screen.position()
             elif not pygame.mixer.music.get_busy():
                 pygame.mixer.music.play(-1)     # music loop
             pygame.display.flip()
+            if first_frame:
+                self.startup_timer.mark('first frame')
+                first_frame = False
+            else:
+                self.startup_timer.begin()
+                if intro_seq.load_next():
+                    self.startup_timer.mark('intro scene')
+                elif not self.load_next() and not self.startup_timer.reported:
+                    TextureAtlas.refresh(Maze.BLOCK_SIZE)   # so the next start loads every frame at once
+                    self.startup_timer.mark('atlas')
+                    self.startup_timer.report()
 
-    def play_game(self):
-        """Run the game's event loop, using an EventLoop object"""
-        e_loop = EventLoop(loop_running=True, actions={**self.player.event_map, **self.actions})
+    def start_game(self):
+        """Prepare a new game and return the event loop which drives it"""
+        self.finish_loading()
+        e_loop = EventLoop(loop_running=True, actions={**self.player.event_map, **self.actions},
+                           record_log=self.record_log, replay_log=self.replay_log, unrecorded_keys=(pygame.K_F3, ))
         # game init signal
-        # pygame.time.set_timer(PacManPortalGame.START_EVENT, self.level_transition.transition_time)
+        # GameClock.set_timer(PacManPortalGame.START_EVENT, self.level_transition.transition_time)
         self.level_transition.set_show_transition()
         self.game_over = False
         if self.player.dead:
@@ -207,17 +355,106 @@ class PacManPortalGame:
             self.score_keeper.reset_level()
             self.life_counter.reset_counter()
             self.rebuild_maze()
+        return e_loop
 
+    def check_game_over(self, e_loop):
+        """Stop the game's event loop if the game has ended"""
+        if self.game_over:
+            if pygame.mixer.get_init():
+                pygame.mixer.stop()
+            self.score_keeper.reset_level()
+            e_loop.loop_running = False
+
+    def play_game(self):
+        """Run the game's event loop, using an EventLoop object.
+        The game is simulated in fixed time steps as real time accumulates, and rendered once per frame,
+        so slow frames skip renders instead of slowing the game down."""
+        e_loop = self.start_game()
+        lag = 0.0   # real milliseconds not yet simulated
+        self.clock.tick()
         while e_loop.loop_running:
-            self.clock.tick(60)  # 60 fps limit
+            self.frame_timer.begin_frame()
+            lag += min(self.clock.tick(60), PacManPortalGame.MAX_FRAME_TIME)  # 60 fps limit
+            self.frame_timer.mark('wait')
+            stepped = False
+            while lag >= self.step_time and e_loop.loop_running:
+                lag -= self.step_time
+                GameClock.advance(self.step_time)
+                e_loop.check_events()
+                if not e_loop.loop_running:
+                    break   # replay finished
+                self.frame_timer.mark('events')
+                self.update_game()
+                self.check_game_over(e_loop)
+                stepped = True
+            if stepped:
+                self.render_screen()
+
+    def simulate_game(self, max_steps=None, controller=None, step_times=None):
+        """Run a game headless as fast as possible using a fixed logical time step, and return run statistics.
+        If given, controller is called with the step number before each step's events are checked (to post input),
+        and each step's duration in seconds is appended to the step_times list."""
+        e_loop = self.start_game()
+        steps = 0
+        score, level = 0, 1
+        start = perf_counter()
+        while e_loop.loop_running and (max_steps is None or steps < max_steps):
+            step_start = perf_counter()
+            GameClock.advance(self.step_time)
+            if controller:
+                controller(steps)
             e_loop.check_events()
-            self.update_screen()
-            if self.game_over:
-                pygame.mixer.stop()
-                self.score_keeper.reset_level()
-                e_loop.loop_running = False
+            if not e_loop.loop_running:
+                break   # replay finished
+            self.update_game()
+            score, level = self.score_keeper.score, self.score_keeper.level   # saved before a game over reset
+            self.check_game_over(e_loop)
+            steps += 1
+            if step_times is not None:
+                step_times.append(perf_counter() - step_start)
+        elapsed = perf_counter() - start
+        return {'steps': steps, 'seconds': elapsed, 'steps_per_second': steps / elapsed if elapsed else 0.0,
+                'score': score, 'level': level, 'game_over': self.game_over}
 
 
 if __name__ == '__main__':
-    game = PacManPortalGame()
-    game.run()
+    parser = argparse.ArgumentParser(description='PacMan Portal')
+    parser.add_argument('--headless', action='store_true',
+                        help='simulate a game without a window or audio, as fast as possible')
+    parser.add_argument('--steps', type=int, default=None, help='maximum number of headless simulation steps')
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help='redraw only changed screen areas during play instead of flipping the whole display')
+    parser.add_argument('--seed', type=int, default=None, help='seed for the random maze fruit placement')
+    parser.add_argument('--record', metavar='FILE',
+                        help='play a single game right away, writing its inputs and seed to FILE')
+    parser.add_argument('--replay', metavar='FILE',
+                        help='replay a recorded game from FILE (uncapped when combined with --headless)')
+    parser.add_argument('--ghost-engine', action='store_true',
+                        help='move all ghosts together with the NumPy ghost engine (requires numpy)')
+    args = parser.parse_args()
+    if args.ghost_engine and not GhostEngine.available():
+        parser.error('--ghost-engine requires numpy')
+    if args.record:
+        log = InputLog(args.seed if args.seed is not None else random.randrange(2 ** 32),
+                       PacManPortalGame.STEP_TIME)
+        game = PacManPortalGame(dirty_rendering=args.dirty_rects, seed=log.seed, record_log=log,
+                                ghost_engine=args.ghost_engine)
+        try:
+            game.play_game()
+        finally:    # save even if the window is closed mid-game
+            log.save(args.record)
+    elif args.replay:
+        log = InputLog.load(args.replay)
+        game = PacManPortalGame(headless=args.headless, dirty_rendering=args.dirty_rects, replay_log=log,
+                                ghost_engine=args.ghost_engine)
+        if args.headless:
+            print(game.simulate_game(max_steps=args.steps))
+        else:
+            game.play_game()
+    elif args.headless:
+        game = PacManPortalGame(headless=True, seed=args.seed, ghost_engine=args.ghost_engine)
+        print(game.simulate_game(max_steps=args.steps))
+    else:
+        game = PacManPortalGame(dirty_rendering=args.dirty_rects, seed=args.seed, ghost_engine=args.ghost_engine,
+                                defer_loading=True)
+        game.run()
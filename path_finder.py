@@ -0,0 +1,123 @@
+from collections import deque
+
+
+class PathFinder:
+    """Finds shortest paths over a maze map, caching a distance/next-hop table for each target tile"""
+    BLOCKED = ('x', )
+    DIRECTIONS = {'u': (-1, 0), 'l': (0, -1), 'd': (1, 0), 'r': (0, 1)}    # (row, col) step for each direction
+    REVERSE = {'u': 'd', 'l': 'r', 'd': 'u', 'r': 'l'}
+    loaded = {}     # path finders shared between all users of the same maze map
+
+    def __init__(self, maze_map):
+        self.maze_map = [line.rstrip('\n') for line in maze_map]
+        self.tables = {}    # target tile -> (distances, next hops)
+
+    @classmethod
+    def for_map(cls, maze_map):
+        """Return the shared path finder for a maze map, creating it on first use"""
+        key = tuple(maze_map)
+        if key not in cls.loaded:
+            cls.loaded[key] = cls(maze_map)
+        return cls.loaded[key]
+
+    def is_open(self, tile):
+        """Return True if the tile is inside the map and not blocked"""
+        row, col = tile
+        return 0 <= row < len(self.maze_map) and 0 <= col < len(self.maze_map[row]) and \
+            self.maze_map[row][col] not in PathFinder.BLOCKED
+
+    @staticmethod
+    def step(tile, direction):
+        """Return the tile one step from the given tile in a direction"""
+        d_row, d_col = PathFinder.DIRECTIONS[direction]
+        return tile[0] + d_row, tile[1] + d_col
+
+    @staticmethod
+    def neighbors(tile):
+        """Return the four tiles adjacent to the given tile"""
+        return [(tile[0] + 1, tile[1]), (tile[0] - 1, tile[1]), (tile[0], tile[1] + 1), (tile[0], tile[1] - 1)]
+
+    @staticmethod
+    def search(target, is_open):
+        """Breadth first search outward from a target tile over the tiles passing is_open,
+        returning the distance and next-hop tables toward the target"""
+        distances = {target: 0}
+        next_hops = {target: None}
+        queue = deque([target])
+        while queue:
+            tile = queue.popleft()
+            for opt in PathFinder.neighbors(tile):
+                if opt not in distances and is_open(opt):
+                    distances[opt] = distances[tile] + 1
+                    next_hops[opt] = tile   # first step from opt toward the target
+                    queue.append(opt)
+        return distances, next_hops
+
+    def get_table(self, target):
+        """Return the distance and next-hop tables toward a target tile, building them by BFS if needed"""
+        if target not in self.tables:
+            self.tables[target] = PathFinder.search(target, self.is_open)
+        return self.tables[target]
+
+    def find_path(self, start, target):
+        """Return the tiles of the shortest path from start to target, excluding start and including target"""
+        distances, next_hops = self.get_table(target)
+        path = []
+        if start not in distances:  # start off the open map (e.g. clipping a wall), step to the best neighbor
+            options = [opt for opt in PathFinder.neighbors(start) if opt in distances]
+            if not options:
+                return path
+            start = min(options, key=lambda x: distances[x])
+            path.append(start)
+        tile = next_hops[start]
+        while tile is not None:
+            path.append(tile)
+            tile = next_hops[tile]
+        return path
+
+
+class FlowField:
+    """Distances over the live tile grid from a single target tile, shared by everyone heading toward (or away from)
+    that target, and rebuilt only when the target moves to another tile or the grid changes"""
+
+    def __init__(self, grid, barriers):
+        self.grid = grid
+        self.barriers = barriers    # grid flags which block movement
+        self.target = None
+        self.grid_version = None
+        self.distances = {}     # tile -> steps to the target
+        self.version = 0    # incremented on every rebuild, so copies of the distances know when they are stale
+
+    def is_open(self, tile):
+        """Return True if the tile is inside the grid and not blocked"""
+        row, col = tile
+        return 0 <= row < len(self.grid.cells) and 0 <= col < len(self.grid.cells[row]) and \
+            not self.grid.cells[row][col] & self.barriers
+
+    def update(self, target):
+        """Rebuild the distances by BFS if the target tile or the grid has changed since the last build"""
+        if target == self.target and self.grid.version == self.grid_version:
+            return
+        self.target, self.grid_version = target, self.grid.version
+        self.distances = PathFinder.search(target, self.is_open)[0]
+        self.version += 1
+
+    def get_distance(self, tile, direction=None):
+        """Return the distance to the target from a tile, or from its neighbour in a direction, None if unreachable"""
+        if direction:
+            tile = PathFinder.step(tile, direction)
+        return self.distances.get(tile)
+
+    def pick(self, tile, options, toward=True, heading=None):
+        """Return the first of the options whose neighbouring tile is nearest to the target, or farthest from it,
+        or None if the target can't be reached through any of them. Turning back against the heading is never
+        picked, so movers can't flip between two tiles that each point at the other"""
+        best, best_distance = None, None
+        for direction in options:
+            if heading and direction == PathFinder.REVERSE[heading]:
+                continue
+            distance = self.get_distance(tile, direction)
+            if distance is not None and (best is None or
+                                         (distance < best_distance if toward else distance > best_distance)):
+                best, best_distance = direction, distance
+        return best
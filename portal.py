@@ -1,5 +1,5 @@
 import pygame
-from maze import Block
+from maze import Block, TileGrid
 from image_manager import ImageManager
 from sound_manager import SoundManager
 
@@ -54,8 +54,8 @@ class Portal(Block):
         self.image = self.image_manager.next_image()
 
     def blit(self):
-        """Blit the portal to the screen"""
-        self.screen.blit(self.image, self.rect)
+        """Blit the portal to the screen, returning the area drawn"""
+        return self.screen.blit(self.image, self.rect)
 
 
 class PortalProjectile(pygame.sprite.Sprite):
@@ -73,6 +73,9 @@ class PortalProjectile(pygame.sprite.Sprite):
         else:
             self.image.fill(Portal.TYPE_2_COLOR)
         self.rect = self.image.get_rect()
+        self.moves_left = None  # moves until the projectile stops, set by cast
+        self.impact = None  # the wall tile it stops on, None if it stops on a portal or off screen
+        self.grid_version = None    # version of the maze grid the path was cast over
         self.rect.centerx, self.rect.centery = source.rect.centerx, source.rect.centery
         x_offset = int(source.rect.width * 0.5)
         y_offset = int(source.rect.height * 0.5)
@@ -85,6 +88,51 @@ class PortalProjectile(pygame.sprite.Sprite):
         else:
             self.rect.centery += y_offset
 
+    def cast(self, grid, barriers):
+        """Find where the projectile will stop by stepping tile by tile along its path over the maze grid (a DDA
+        raycast along an axis), setting the number of moves left until then and the tile it will hit, if any"""
+        d_x, d_y = TileGrid.DIRECTIONS[self.direction]
+        sign = d_x + d_y
+        if d_x:     # position and size along the path, and the tiles spanned across it
+            start, lead, size, screen_size = grid.x_start, self.rect.x, self.rect.width, self.screen.get_width()
+            lanes = range(grid.get_tile(0, self.rect.top)[0], grid.get_tile(0, self.rect.bottom - 1)[0] + 1)
+        else:
+            start, lead, size, screen_size = grid.y_start, self.rect.y, self.rect.height, self.screen.get_height()
+            lanes = range(grid.get_tile(self.rect.left, 0)[1], grid.get_tile(self.rect.right - 1, 0)[1] + 1)
+        if self.is_off_screen():
+            off_screen = 1
+        elif sign < 0:
+            off_screen = (lead // self.speed) + 1
+        else:
+            off_screen = ((screen_size + size - lead) // self.speed) + 1
+        if sign > 0:
+            lead += size - 1    # leading edge pixel
+        self.moves_left, self.impact, self.grid_version = off_screen, None, grid.version
+        tile = (lead + sign * (self.speed - size + 1) - start) // grid.block_size     # holding the trailing edge
+        while True:     # after the first move
+            edge = start + (tile * grid.block_size) + (0 if sign > 0 else grid.block_size - 1)    # near side
+            moves = max(-(-(edge - lead) * sign // self.speed), 1)   # first move reaching the tile, rounded up
+            if moves > off_screen:
+                break
+            trail = lead + sign * ((moves * self.speed) - size + 1)
+            if (trail - edge) * sign < grid.block_size and \
+                    any(grid.get_flags(*((lane, tile) if d_x else (tile, lane))) & barriers for lane in lanes):
+                self.moves_left = moves
+                self.impact = self.get_impact(grid, barriers, lanes, (trail - start) // grid.block_size,
+                                              (lead + sign * moves * self.speed - start) // grid.block_size)
+                break
+            tile += sign
+
+    def get_impact(self, grid, barriers, lanes, first, last):
+        """Return the first wall tile under the projectile, going from the tile under its trailing edge to the one
+        under its leading edge, or None if a portal is under it too (projectiles hitting a portal are lost)"""
+        step = 1 if last >= first else -1
+        tiles = [(lane, tile) if self.direction in 'lr' else (tile, lane)
+                 for tile in range(first, last + step, step) for lane in lanes]
+        if any(grid.get_flags(*tile) & TileGrid.PORTAL for tile in tiles):
+            return None
+        return next(tile for tile in tiles if grid.get_flags(*tile) & barriers)
+
     def update(self):
         """Update the projectile as it moves across the screen"""
         if self.direction == 'l':
@@ -95,6 +143,7 @@ class PortalProjectile(pygame.sprite.Sprite):
             self.rect.centery -= self.speed
         else:
             self.rect.centery += self.speed
+        self.moves_left -= 1
 
     def is_off_screen(self):
         """Return True if projectile is off screen, False otherwise"""
@@ -105,13 +154,14 @@ class PortalProjectile(pygame.sprite.Sprite):
         return False
 
     def blit(self):
-        """Blit the projectile to the screen"""
-        self.screen.blit(self.image, self.rect)
+        """Blit the projectile to the screen, returning the area drawn"""
+        return self.screen.blit(self.image, self.rect)
 
 
 class PortalController:
     """Manages portals and their related functionality within the game"""
     PORTAL_AUDIO_CHANNEL = 3
+    BARRIERS = TileGrid.WALL | TileGrid.PORTAL  # tiles which stop projectiles
 
     def __init__(self, screen, user, maze):
         self.screen = screen
@@ -128,6 +178,8 @@ class PortalController:
 
     def clear_portals(self):
         """Remove all portals and projectiles"""
+        for portal in self.blue_portal.sprites() + self.orange_portal.sprites():
+            self.maze.grid.set_flags_at(portal.rect.x, portal.rect.y, TileGrid.OPEN)
         self.blue_portal.empty()
         self.orange_portal.empty()
         self.blue_projectile = None
@@ -138,20 +190,21 @@ class PortalController:
         if self.user.direction is not None:
             self.blue_projectile = PortalProjectile(screen=self.screen, source=self.user, direction=self.user.direction,
                                                     p_type=Portal.P_TYPE_1)
+            self.blue_projectile.cast(self.maze.grid, PortalController.BARRIERS)
 
     def fire_o_portal_projectile(self):
         """Create a projectile for generating an orange portal"""
         if self.user.direction is not None:
             self.orange_projectile = PortalProjectile(screen=self.screen, source=self.user,
                                                       direction=self.user.direction, p_type=Portal.P_TYPE_2)
+            self.orange_projectile.cast(self.maze.grid, PortalController.BARRIERS)
 
     def create_blue_portal(self, x, y, direction):
         """Create a blue portal, replacing the location it originally took up with a normal maze block"""
         if self.blue_portal:
             old_x, old_y = self.blue_portal.sprite.rect.x, self.blue_portal.sprite.rect.y
-            self.maze.maze_blocks.add(
-                Block(old_x, old_y, self.maze.block_size, self.maze.block_size, self.maze.block_image)
-            )
+            self.maze.restore_block(old_x, old_y)
+        self.maze.grid.set_flags_at(x, y, TileGrid.PORTAL)
         self.blue_portal.add(Portal(screen=self.screen, x=x, y=y, direction=direction,
                                     maze=self.maze, p_type=Portal.P_TYPE_1))
 
@@ -159,51 +212,40 @@ class PortalController:
         """Create a blue portal, replacing the location it originally took up with a normal maze block"""
         if self.orange_portal:
             old_x, old_y = self.orange_portal.sprite.rect.x, self.orange_portal.sprite.rect.y
-            self.maze.maze_blocks.add(
-                Block(old_x, old_y, self.maze.block_size, self.maze.block_size, self.maze.block_image)
-            )
+            self.maze.restore_block(old_x, old_y)
+        self.maze.grid.set_flags_at(x, y, TileGrid.PORTAL)
         self.orange_portal.add(Portal(screen=self.screen, x=x, y=y, direction=direction,
                                       maze=self.maze, p_type=Portal.P_TYPE_2))
 
+    def move_projectile(self, projectile):
+        """Move a projectile toward the end of its path, returning True once it has stopped.
+        Its path is cast again first if the maze has changed since it was found."""
+        if projectile.grid_version != self.maze.grid.version:
+            projectile.cast(self.maze.grid, PortalController.BARRIERS)
+        projectile.update()
+        return projectile.moves_left <= 0
+
+    def open_portal(self, projectile, create_portal):
+        """Replace the wall block a projectile hit with a new portal, facing back the way the projectile came"""
+        block = self.maze.get_block(*projectile.impact)
+        x, y = block.rect.x, block.rect.y
+        self.maze.remove_block(block)   # Replace the block with a portal
+        create_portal(x, y, self.portal_directions[projectile.direction])
+        self.sound_manager.play('open')
+
     def update(self):
         """Update the portal controller's display parts and tracking"""
         self.blue_portal.update()
         self.orange_portal.update()
-        if self.blue_projectile:
-            self.blue_projectile.update()   # update projectile
-            # erase projectile if it hits a portal
-            if pygame.sprite.spritecollideany(self.blue_projectile, self.blue_portal) or \
-                    pygame.sprite.spritecollideany(self.blue_projectile, self.orange_portal):
-                self.blue_projectile = None
-                return
-            collision = pygame.sprite.spritecollideany(self.blue_projectile, self.maze.maze_blocks)
-            if collision:   # if projectile hits a block, replace it with a blue portal
-                x, y = collision.rect.x, collision.rect.y
-                collision.kill()    # Replace the block with a portal
-                direction = self.portal_directions[self.blue_projectile.direction]
-                self.blue_projectile = None     # remove the projectile
-                self.create_blue_portal(x, y, direction)
-                self.sound_manager.play('open')
-            # remove if projectile off screen
-            elif self.blue_projectile.is_off_screen():
-                self.blue_projectile = None
-        if self.orange_projectile:
-            self.orange_projectile.update()
-            # erase projectile if it hits a portal
-            if pygame.sprite.spritecollideany(self.orange_projectile, self.blue_portal) or \
-                    pygame.sprite.spritecollideany(self.orange_projectile, self.orange_portal):
-                self.orange_projectile = None
-                return
-            collision = pygame.sprite.spritecollideany(self.orange_projectile, self.maze.maze_blocks)
-            if collision:   # if projectile hits a block, replace it with an orange portal
-                x, y = collision.rect.x, collision.rect.y
-                collision.kill()  # Replace the block with a portal
-                direction = self.portal_directions[self.orange_projectile.direction]
-                self.orange_projectile = None   # remove the projectile
-                self.create_orange_portal(x, y, direction)
-                self.sound_manager.play('open')
-            elif self.orange_projectile.is_off_screen():
-                self.orange_projectile = None
+        # projectiles stop on a wall block (opening a portal there), on a portal or off screen
+        if self.blue_projectile and self.move_projectile(self.blue_projectile):
+            projectile, self.blue_projectile = self.blue_projectile, None
+            if projectile.impact:
+                self.open_portal(projectile, self.create_blue_portal)
+        if self.orange_projectile and self.move_projectile(self.orange_projectile):
+            projectile, self.orange_projectile = self.orange_projectile, None
+            if projectile.impact:
+                self.open_portal(projectile, self.create_orange_portal)
 
     def portables_usable(self):
         """Return True if the portables are usable (i.e. there are two of them)"""
@@ -253,12 +295,14 @@ class PortalController:
                 self.sound_manager.play('travel')
 
     def blit(self):
-        """Blit the portal controller's display components to the screen"""
+        """Blit the portal controller's display components to the screen, returning the areas drawn"""
+        drawn = []
         if self.blue_projectile:
-            self.blue_projectile.blit()
+            drawn.append(self.blue_projectile.blit())
         if self.orange_projectile:
-            self.orange_projectile.blit()
+            drawn.append(self.orange_projectile.blit())
         if self.blue_portal:
-            self.blue_portal.sprite.blit()
+            drawn.append(self.blue_portal.sprite.blit())
         if self.orange_portal:
-            self.orange_portal.sprite.blit()
+            drawn.append(self.orange_portal.sprite.blit())
+        return drawn
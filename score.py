@@ -1,4 +1,7 @@
 from sound_manager import SoundManager
+from game_clock import GameClock
+from image_manager import ImageManager
+from text_cache import TextCache
 import json
 import pygame
 
@@ -34,19 +37,21 @@ class LevelTransition:
     def set_show_transition(self):
         """Begin the sequence for displaying the transition"""
         self.prep_level_msg()
-        self.transition_begin = pygame.time.get_ticks()
+        self.transition_begin = GameClock.get_ticks()
         self.transition_show = True
         self.sound.play('transition')
 
+    def update(self):
+        """End the transition once its display time has passed"""
+        if abs(self.transition_begin - GameClock.get_ticks()) > self.transition_time:
+            self.transition_show = False
+
     def draw(self):
         """Display the level transition to the screen"""
-        if abs(self.transition_begin - pygame.time.get_ticks()) > self.transition_time:
-            self.transition_show = False
-        else:
-            self.screen.fill((0, 0, 0))
-            self.screen.blit(self.level_msg, self.level_msg_rect)
-            if abs(self.transition_begin - pygame.time.get_ticks()) >= self.transition_time // 2:
-                self.screen.blit(self.ready_msg, self.ready_msg_rect)
+        self.screen.fill((0, 0, 0))
+        self.screen.blit(self.level_msg, self.level_msg_rect)
+        if abs(self.transition_begin - GameClock.get_ticks()) >= self.transition_time // 2:
+            self.screen.blit(self.ready_msg, self.ready_msg_rect)
 
 
 class ScoreBoard:
@@ -58,7 +63,7 @@ class ScoreBoard:
         self.screen = screen
         self.score = 0
         self.color = ScoreBoard.SCORE_WHITE
-        self.font = pygame.font.Font('fonts/LuckiestGuy-Regular.ttf', 36)
+        self.font = TextCache.get_font('fonts/LuckiestGuy-Regular.ttf', 36)
         self.image = None
         self.rect = None
         self.prep_image()
@@ -71,12 +76,13 @@ class ScoreBoard:
 
     def prep_image(self):
         """Render the score to a font image"""
-        score_str = str(self.score)
-        self.image = self.font.render(score_str, True, self.color)
+        self.image = TextCache.render_number(self.font, self.score, self.color)
         self.rect = self.image.get_rect()
 
     def update(self, n_score):
         """Increment the scoreboard and prepare a new image"""
+        if not n_score:
+            return  # nothing changed, so keep the current image
         self.score += n_score
         self.prep_image()
         self.position()
@@ -88,8 +94,8 @@ class ScoreBoard:
         self.position()
 
     def blit(self):
-        """Blit the score to the screen"""
-        self.screen.blit(self.image, self.rect)
+        """Blit the score to the screen, returning the area drawn"""
+        return self.screen.blit(self.image, self.rect)
 
 
 class ItemCounter:
@@ -97,9 +103,9 @@ class ItemCounter:
     def __init__(self, screen, image_name, pos=(0, 0)):
         self.screen = screen
         self.counter = 0
-        self.item_image = pygame.image.load('images/' + image_name)
+        self.item_image, _ = ImageManager(image_name, convert=False, transparency=False).get_image()
         self.item_rect = self.item_image.get_rect()
-        self.font = pygame.font.Font('fonts/LuckiestGuy-Regular.ttf', 36)
+        self.font = TextCache.get_font('fonts/LuckiestGuy-Regular.ttf', 36)
         self.color = ScoreBoard.SCORE_WHITE
         self.text_image = None
         self.text_rect = None
@@ -119,7 +125,7 @@ class ItemCounter:
     def prep_image(self):
         """Render the counter's image for future display"""
         text = str(self.counter) + ' X '
-        self.text_image = self.font.render(text, True, self.color)
+        self.text_image = TextCache.render(self.font, text, self.color)
         self.text_rect = self.text_image.get_rect()
         self.position()
 
@@ -130,9 +136,9 @@ class ItemCounter:
         self.item_rect.centerx, self.item_rect.centery = self.pos[0] + x_offset, self.pos[1]
 
     def blit(self):
-        """Blit the counter to the screen"""
-        self.screen.blit(self.text_image, self.text_rect)
-        self.screen.blit(self.item_image, self.item_rect)
+        """Blit the counter to the screen, returning the areas drawn"""
+        return [self.screen.blit(self.text_image, self.text_rect),
+                self.screen.blit(self.item_image, self.item_rect)]
 
 
 class ScoreController:
@@ -163,9 +169,8 @@ class ScoreController:
             self.item_counter.add_items(items)
 
     def blit(self):
-        """Blit all score related displays to the screen"""
-        self.scoreboard.blit()
-        self.item_counter.blit()
+        """Blit all score related displays to the screen, returning the areas drawn"""
+        return [self.scoreboard.blit()] + self.item_counter.blit()
 
     def init_high_scores(self):
         """Read saved high scores from local storage"""
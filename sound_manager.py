@@ -1,31 +1,81 @@
+import io
+import os
+import threading
 import pygame
 
 
+class SoundBank:
+    """Decodes each sound file once and shares it between all sound managers.
+    Sounds can be loaded ahead of use on a background thread, any not loaded yet are decoded on first play."""
+    SOUND_DIR = 'sounds/'
+    MUSIC_FILES = ['bg-music.wav']  # streamed by pygame.mixer.music, never decoded into the bank
+    sounds = {}     # sound file -> decoded sound
+    lock = threading.Lock()     # held while decoding, so a file is never decoded twice
+    loader = None   # background loading thread, once started
+
+    @staticmethod
+    def decode(s_file, data=None):
+        """Decode a sound file, or its already read bytes, into the bank if it isn't there yet"""
+        with SoundBank.lock:
+            if s_file not in SoundBank.sounds:
+                source = io.BytesIO(data) if data is not None else SoundBank.SOUND_DIR + s_file
+                SoundBank.sounds[s_file] = pygame.mixer.Sound(source)
+            return SoundBank.sounds[s_file]
+
+    @staticmethod
+    def get(s_file):
+        """Return the decoded sound for a file, decoding it now if it hasn't been loaded yet"""
+        sound = SoundBank.sounds.get(s_file)
+        if sound is None:
+            sound = SoundBank.decode(s_file)
+        return sound
+
+    @staticmethod
+    def load_all(sound_files):
+        """Load sound files into the bank, reading each file before taking the decoding lock"""
+        for s_file in sound_files:
+            if s_file not in SoundBank.sounds:
+                with open(SoundBank.SOUND_DIR + s_file, 'rb') as file:
+                    data = file.read()
+                SoundBank.decode(s_file, data)
+
+    @staticmethod
+    def preload(sound_files=None):
+        """Start loading sound files (by default every sound in the sound directory) on a background thread"""
+        if not pygame.mixer.get_init() or SoundBank.loader:
+            return  # no mixer to decode for, or already loading
+        if sound_files is None:
+            sound_files = sorted(f for f in os.listdir(SoundBank.SOUND_DIR)
+                                 if f.endswith('.wav') and f not in SoundBank.MUSIC_FILES)
+        SoundBank.loader = threading.Thread(target=SoundBank.load_all, args=(sound_files, ), daemon=True)
+        SoundBank.loader.start()
+
+
 class SoundManager:
-    """Handles the playing of sound over pygame mixer"""
+    """Handles the playing of sound over pygame mixer, on a single channel with sounds from the shared SoundBank"""
     def __init__(self, sound_files, keys=None, channel=0, volume=None):
         self.sound_files = sound_files
-        self.sounds = {}
+        if keys and len(keys) != len(sound_files):
+            raise ValueError('number of keys must be the same as the number of sound files')
+        self.sounds = dict(zip(keys or sound_files, sound_files))   # key -> sound file, decoded by the bank
+        self.channel = None
+        if not pygame.mixer.get_init():
+            return  # no mixer (e.g. headless simulation), so stay silent
         self.channel = pygame.mixer.Channel(channel)
-        if not keys:
-            for s_file in sound_files:
-                self.sounds[s_file] = pygame.mixer.Sound('sounds/' + s_file)
-        else:
-            if len(keys) != len(sound_files):
-                raise ValueError('number of keys must be the same as the number of sound files')
-            for key, s_file in zip(keys, sound_files):
-                self.sounds[key] = pygame.mixer.Sound('sounds/' + s_file)
         if isinstance(volume, float):
             self.channel.set_volume(volume)
 
     def play(self, key):
         """Play a sound once"""
-        self.channel.play(self.sounds[key], loops=0)
+        if self.channel:
+            self.channel.play(SoundBank.get(self.sounds[key]), loops=0)
 
     def play_loop(self, key):
         """Loop a sound indefinitely"""
-        self.channel.play(self.sounds[key], loops=-1)
+        if self.channel:
+            self.channel.play(SoundBank.get(self.sounds[key]), loops=-1)
 
     def stop(self):
         """Stop sound from playing"""
-        self.channel.stop()
+        if self.channel:
+            self.channel.stop()
@@ -0,0 +1,65 @@
+import pygame
+from collections import OrderedDict
+
+
+class TextCache:
+    """Shares fonts and rendered text surfaces, evicting the least recently used renders past a size limit"""
+    MAX_RENDERS = 256
+    fonts = {}      # (font file, size) -> font
+    glyphs = {}     # (font, character, color) -> rendered digit
+    renders = OrderedDict()     # (font, text, color) -> rendered text, in least to most recently used order
+
+    @staticmethod
+    def get_font(font_file, size):
+        """Return the shared font for a font file and size, where a file of None is pygame's default font"""
+        key = (font_file, size)
+        if key not in TextCache.fonts:
+            TextCache.fonts[key] = pygame.font.Font(font_file, size)
+        return TextCache.fonts[key]
+
+    @staticmethod
+    def lookup(key):
+        """Return a cached render and mark it as recently used, or None if it is not cached"""
+        image = TextCache.renders.get(key)
+        if image is not None:
+            TextCache.renders.move_to_end(key)
+        return image
+
+    @staticmethod
+    def store(key, image):
+        """Cache a render, evicting the least recently used one if the cache is full"""
+        TextCache.renders[key] = image
+        if len(TextCache.renders) > TextCache.MAX_RENDERS:
+            TextCache.renders.popitem(last=False)
+        return image
+
+    @staticmethod
+    def render(font, text, color):
+        """Return an anti-aliased render of the text, shared between all callers so it must not be drawn on"""
+        key = (font, text, tuple(color))
+        image = TextCache.lookup(key)
+        if image is None:
+            image = TextCache.store(key, font.render(text, True, color))
+        return image
+
+    @staticmethod
+    def render_number(font, number, color):
+        """Return a render of a whole number, composited from individually rendered digit glyphs"""
+        text = str(number)
+        key = (font, text, tuple(color))
+        image = TextCache.lookup(key)
+        if image is None:
+            digits = []
+            for char in text:
+                glyph_key = (font, char, tuple(color))
+                if glyph_key not in TextCache.glyphs:
+                    TextCache.glyphs[glyph_key] = font.render(char, True, color)
+                digits.append(TextCache.glyphs[glyph_key])
+            image = pygame.Surface((sum(d.get_width() for d in digits), max(d.get_height() for d in digits)),
+                                   pygame.SRCALPHA)
+            x = 0
+            for digit in digits:
+                image.blit(digit, (x, 0))
+                x += digit.get_width()
+            TextCache.store(key, image)
+        return image
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import pygame
+from image_manager import ImageManager
+
+
+class TextureAtlas:
+    """Packs the prepared frames of every image manager into a few large surfaces, cached on disk.
+    A cached atlas is loaded with one image read per page and fills the ImageManager frame cache with subsurfaces,
+    so frames need no sprite sheet loading, extraction or scaling. The cache is keyed by a hash of the source images
+    and the maze block size, any change to either builds a new atlas."""
+    CACHE_DIR = 'atlas_cache'
+    IMAGE_DIR = 'images'
+    PAGE_SIZE = (1024, 1024)    # largest size of a single atlas surface
+    FORMAT = 1  # bumped whenever the cached layout changes
+    loaded = False  # True if frames were served from a cached atlas
+    packed = set()  # frame cache keys in the current atlas
+
+    @staticmethod
+    def get_key(block_size):
+        """Return the cache key for the current source images and block size"""
+        digest = hashlib.sha1(('%d:%d' % (TextureAtlas.FORMAT, block_size)).encode())
+        for img in sorted(os.listdir(TextureAtlas.IMAGE_DIR)):
+            if img.endswith('.png'):
+                digest.update(img.encode())
+                with open(os.path.join(TextureAtlas.IMAGE_DIR, img), 'rb') as file:
+                    digest.update(hashlib.sha1(file.read()).digest())
+        return digest.hexdigest()
+
+    @staticmethod
+    def index_path(key):
+        """Return the path of the index file of an atlas"""
+        return os.path.join(TextureAtlas.CACHE_DIR, 'atlas-%s.json' % key)
+
+    @staticmethod
+    def page_path(key, page):
+        """Return the path of a page image of an atlas"""
+        return os.path.join(TextureAtlas.CACHE_DIR, 'atlas-%s-%d.png' % (key, page))
+
+    @staticmethod
+    def pack(sizes, page_size):
+        """Place rects of the given sizes on pages in rows (tallest first), returning (page, x, y) for each"""
+        order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+        places = [None] * len(sizes)
+        page, x, y, row_height = 0, 0, 0, 0
+        for i in order:
+            width, height = sizes[i]
+            if x + width > page_size[0]:    # next row
+                x, y, row_height = 0, y + row_height, 0
+            if y + height > page_size[1]:   # next page
+                page, x, y, row_height = page + 1, 0, 0, 0
+            places[i] = (page, x, y)
+            x += width
+            row_height = max(row_height, height)
+        return places
+
+    @staticmethod
+    def save(block_size):
+        """Pack every display format frame in the ImageManager frame cache into an atlas, and write it to the cache,
+        replacing any older atlas"""
+        entries = [(key, frames) for key, frames in ImageManager.frame_cache.items() if key[3]]  # converted frames
+        frames = [frame for _, key_frames in entries for frame in key_frames]
+        if not frames:
+            return
+        places = TextureAtlas.pack([frame.get_size() for frame in frames], TextureAtlas.PAGE_SIZE)
+        pages = []
+        for page in range(max(place[0] for place in places) + 1):
+            on_page = [(frame, place) for frame, place in zip(frames, places) if place[0] == page]
+            pages.append(pygame.Surface((max(x + f.get_width() for f, (_, x, _) in on_page),
+                                         max(y + f.get_height() for f, (_, _, y) in on_page))))
+        for frame, (page, x, y) in zip(frames, places):
+            pages[page].blit(frame, (x, y))     # transparent pixels are black, as is the page
+        index, i = [], 0
+        for (img, offsets, resize, convert, transparency), key_frames in entries:
+            rects = [[places[i + j][0], places[i + j][1], places[i + j][2], *frame.get_size()]
+                     for j, frame in enumerate(key_frames)]
+            index.append([img, offsets, resize, convert, transparency, rects])
+            i += len(key_frames)
+        key = TextureAtlas.get_key(block_size)
+        os.makedirs(TextureAtlas.CACHE_DIR, exist_ok=True)
+        for old in os.listdir(TextureAtlas.CACHE_DIR):
+            if old.startswith('atlas-') and key not in old:
+                os.remove(os.path.join(TextureAtlas.CACHE_DIR, old))
+        for page, surface in enumerate(pages):
+            pygame.image.save(surface, TextureAtlas.page_path(key, page))
+        temp_path = TextureAtlas.index_path(key) + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump({'pages': len(pages), 'frames': index}, file)
+        os.replace(temp_path, TextureAtlas.index_path(key))     # written last, so an index always has its pages
+        TextureAtlas.packed = {key for key, _ in entries}
+
+    @staticmethod
+    def refresh(block_size):
+        """Save the atlas again if frames it doesn't hold have been prepared since it was loaded or saved"""
+        if any(key[3] and key not in TextureAtlas.packed for key in ImageManager.frame_cache):
+            TextureAtlas.save(block_size)
+
+    @staticmethod
+    def load(block_size):
+        """Fill the ImageManager frame cache from the cached atlas, returning False if there is no current atlas.
+        Needs the display to be set up, since pages are converted to its format."""
+        key = TextureAtlas.get_key(block_size)
+        try:
+            with open(TextureAtlas.index_path(key), 'r') as file:
+                index = json.load(file)
+            pages = [pygame.image.load(TextureAtlas.page_path(key, page)).convert() for page in range(index['pages'])]
+        except (OSError, ValueError, KeyError, pygame.error):
+            return False
+        for img, offsets, resize, convert, transparency, rects in index['frames']:
+            frame_key = (img, tuple(tuple(rect) for rect in offsets) if offsets else None,
+                         tuple(resize) if resize else None, convert, transparency)
+            frames = [pages[page].subsurface((x, y, width, height)) for page, x, y, width, height in rects]
+            if transparency:
+                for frame in frames:
+                    frame.set_colorkey((0, 0, 0, 0))
+            ImageManager.frame_cache.setdefault(frame_key, frames)
+            TextureAtlas.packed.add(frame_key)
+        TextureAtlas.loaded = True
+        return True
+
+
+def main():
+    """Build the atlas from every frame a game and its intro load, without opening a window"""
+    from pacman_game import PacManPortalGame
+    from maze import Maze
+    from intro import Intro
+    from portal import Portal
+    game = PacManPortalGame(headless=True)
+    intro = Intro(game.screen)
+    while intro.load_next():
+        pass
+    for p_type in (Portal.P_TYPE_1, Portal.P_TYPE_2):   # portal frames are otherwise only loaded during play
+        Portal(game.screen, 0, 0, 'l', game.maze, p_type)
+    TextureAtlas.save(Maze.BLOCK_SIZE)
+    key = TextureAtlas.get_key(Maze.BLOCK_SIZE)
+    print('wrote', TextureAtlas.index_path(key))
+
+
+if __name__ == '__main__':
+    main()